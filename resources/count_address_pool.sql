@@ -0,0 +1,2 @@
+SELECT Count(*)
+FROM address_pool
\ No newline at end of file
@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS address_pool (
+    address TEXT NOT NULL PRIMARY KEY,
+    privkey TEXT NOT NULL,
+	date_time DATETIME DEFAULT CURRENT_TIMESTAMP
+)
\ No newline at end of file
@@ -0,0 +1,4 @@
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER NOT NULL PRIMARY KEY,
+    block_id TEXT NOT NULL
+)
\ No newline at end of file
@@ -0,0 +1,4 @@
+CREATE TABLE IF NOT EXISTS transactions (
+    txid TEXT NOT NULL PRIMARY KEY,
+    info TEXT NOT NULL
+)
\ No newline at end of file
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS migrations (
+    plugin TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    name TEXT NOT NULL,
+	date_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+	PRIMARY KEY(plugin, version)
+)
\ No newline at end of file
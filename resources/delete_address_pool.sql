@@ -0,0 +1,2 @@
+DELETE FROM address_pool
+WHERE address = ?
\ No newline at end of file
@@ -0,0 +1,2 @@
+DELETE FROM blocks
+WHERE number NOT IN (SELECT number FROM blocks ORDER BY number DESC LIMIT ?)
\ No newline at end of file
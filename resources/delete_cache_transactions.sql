@@ -0,0 +1,2 @@
+DELETE FROM transactions
+WHERE rowid NOT IN (SELECT rowid FROM transactions ORDER BY rowid DESC LIMIT ?)
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT OR IGNORE INTO address_pool (address, privkey)
+VALUES (?, ?)
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT OR REPLACE INTO blocks (number, block_id)
+VALUES (?, ?)
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT OR REPLACE INTO transactions (txid, info)
+VALUES (?, ?)
\ No newline at end of file
@@ -0,0 +1,2 @@
+INSERT INTO migrations (plugin, version, name)
+VALUES (?, ?, ?)
\ No newline at end of file
@@ -0,0 +1,4 @@
+SELECT address, privkey
+FROM address_pool
+ORDER BY rowid
+LIMIT 1
\ No newline at end of file
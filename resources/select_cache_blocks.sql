@@ -0,0 +1,4 @@
+SELECT number, block_id
+FROM blocks
+ORDER BY number DESC
+LIMIT ?
\ No newline at end of file
@@ -0,0 +1,4 @@
+SELECT txid, info
+FROM transactions
+ORDER BY rowid DESC
+LIMIT ?
\ No newline at end of file
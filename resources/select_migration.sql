@@ -0,0 +1,3 @@
+SELECT max(version)
+FROM migrations
+WHERE plugin = ?
\ No newline at end of file
@@ -0,0 +1,7 @@
+SELECT b.bet_address, a.privkey, b.usr_amount, b.bet_won, b.bet_trx_id, IFNULL(b.sweep_attempts, 0)
+FROM bets b
+JOIN addresses a ON a.address = b.bet_address
+WHERE b.rtn_trx_id IS NULL AND (b.pay_trx_id IS NOT NULL OR (b.bet_trx_id IS NULL AND b.date_time < datetime('now', ?)))
+AND IFNULL(b.sweep_attempts, 0) < ?
+ORDER BY b.date_time
+LIMIT ?
@@ -1,3 +0,0 @@
-SELECT name
-FROM sqlite_master
-WHERE type = 'table' AND name = ?
\ No newline at end of file
@@ -0,0 +1,3 @@
+UPDATE bets
+SET sweep_attempts = IFNULL(sweep_attempts, 0) + 1
+WHERE bet_address = ?
\ No newline at end of file
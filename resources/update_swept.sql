@@ -0,0 +1,3 @@
+UPDATE bets
+SET rtn_trx_id = ?
+WHERE bet_address = ?
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import time
+import logging
+import threading
+import trxbetbot.constants as con
+
+from tronapi import Tron
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
+
+
+class AddressPool(threading.Thread):
+    """
+    Keeps a pool of generated and validated betting addresses.
+
+    The pool lives in table 'address_pool' of the global database. If less
+    than 'min_size' addresses are left, the pool gets refilled up to 'size'
+    addresses in chunks of 'batch' addresses with a short pause in between so
+    that user requests are not slowed down. If the pool is empty or disabled,
+    addresses are generated right away.
+    """
+
+    # Seconds to pause between two chunks while refilling
+    PAUSE = 0.1
+
+    def __init__(self, db: ConnectionManager, resources: ResourceCache,
+                 enabled=True, size=100, min_size=25, batch=20, interval=10):
+        super().__init__(name="AddressPool", daemon=True)
+
+        self._db = db
+        self._res = resources
+        self._enabled = enabled
+        self._size = size
+        self._min_size = min_size
+        self._batch = batch
+        self._interval = interval
+
+        self._tron = Tron()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+        self._db_path = os.path.join(os.getcwd(), con.DIR_DAT, con.FILE_DAT)
+
+        self.popped = 0
+        self.generated = 0
+        self.refills = 0
+        self.misses = 0
+        self.latency = None
+
+    def pop(self):
+        """ Return tuple (base58 address, private key) of a new betting address """
+        if self._enabled:
+            try:
+                row = self._take()
+            except Exception as e:
+                row = None
+                logging.error(f"Can't take address from pool: {e}")
+
+            # Refill if needed
+            self._wakeup.set()
+
+            if row:
+                self.popped += 1
+                return row[0], row[1]
+
+            self.misses += 1
+            logging.warning("Address pool is empty. Generating address")
+
+        return self._generate()
+
+    def depth(self):
+        """ Return number of addresses in the pool """
+        return self._db.execute(self._db_path, self._get_sql("count_address_pool.sql"))[0][0]
+
+    def stop(self):
+        """ Stop refilling the pool """
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self):
+        try:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            self._db.execute(self._db_path, self._get_sql("create_address_pool.sql"))
+        except Exception as e:
+            logging.error(f"Can't create address pool: {e}")
+            return
+
+        while not self._stopped.is_set():
+            try:
+                depth = self.depth()
+
+                if depth < self._min_size:
+                    self._refill(self._size - depth)
+            except Exception as e:
+                logging.error(f"Can't refill address pool: {e}")
+
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+
+    def stats(self):
+        """ Return depth of the pool and counters """
+        try:
+            depth = self.depth()
+        except Exception:
+            depth = None
+
+        return {
+            "depth": depth,
+            "popped": self.popped,
+            "misses": self.misses,
+            "refills": self.refills,
+            "latency": self.latency
+        }
+
+    def _refill(self, count):
+        start = time.time()
+        added = 0
+
+        while added < count and not self._stopped.is_set():
+            chunk = [self._generate() for _ in range(min(self._batch, count - added))]
+
+            connection = self._db.get(self._db_path)
+
+            try:
+                connection.executemany(self._get_sql("insert_address_pool.sql"), chunk)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+            added += len(chunk)
+            time.sleep(self.PAUSE)
+
+        self.refills += 1
+        self.latency = round(time.time() - start, 2)
+
+        logging.info(f"Address pool refilled with {added} addresses in {self.latency} seconds")
+
+    def _take(self):
+        """ Remove oldest address from the pool and return it """
+        connection = self._db.get(self._db_path)
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+
+            row = connection.execute(self._get_sql("select_address_pool.sql")).fetchone()
+
+            if row:
+                connection.execute(self._get_sql("delete_address_pool.sql"), (row[0],))
+
+            connection.commit()
+            return row
+        except Exception:
+            connection.rollback()
+            raise
+
+    def _generate(self):
+        account = self._tron.create_account
+
+        if not bool(self._tron.isAddress(account.address.hex)):
+            raise ValueError(f"Generated address is not valid: {account.address.hex}")
+
+        self.generated += 1
+        return account.address.base58, account.private_key
+
+    def _get_sql(self, filename):
+        return self._res.read(os.path.join(os.getcwd(), con.DIR_RES, filename))
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import logging
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.config import ConfigManager
+
+
+class Analytics:
+    """
+    Read-only view over the global database and the databases of all games.
+
+    Every thread gets its own connection to 'global.db' that has the game
+    databases attached. The TEMP views 'all_bets' and 'all_addresses' combine
+    the tables of all attached games and add a 'game' column, so statistics
+    over all games can be done with one SQL statement.
+    """
+
+    GAMES = ["bet", "mix", "win"]
+
+    # Columns that all 'bets' tables have in common
+    BET_COLUMNS = [
+        "bet_address", "bet_chars", "usr_id", "usr_address", "usr_amount",
+        "bet_trx_id", "bet_trx_block", "bet_trx_block_hash", "bet_won",
+        "pay_amount", "pay_trx_id", "date_time", "rtn_trx_id"]
+
+    # Private keys are left out on purpose
+    ADDRESS_COLUMNS = ["address", "date_time"]
+
+    def __init__(self, config: ConfigManager):
+        self._cfg = config
+        self._lock = threading.Lock()
+
+        # Thread ID -> [connection, thread, attached games]
+        self._connections = dict()
+
+    def execute(self, sql, *args):
+        """ Execute read-only SQL statement and return fetched rows """
+        cur = self.get().cursor()
+
+        try:
+            cur.execute(sql, args)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+    def get(self):
+        """ Return analytics connection of current thread. Connection will be
+        recreated if a game database was created since it was opened """
+        thread = threading.current_thread()
+        games = [g for g in self.GAMES if os.path.isfile(self._game_path(g))]
+
+        with self._lock:
+            entry = self._connections.get(thread.ident)
+
+        if entry:
+            connection, owner, attached = entry
+
+            if owner is thread and attached == games:
+                return connection
+
+            self._close(thread.ident)
+
+        connection = self._connect(games)
+
+        with self._lock:
+            self._connections[thread.ident] = [connection, thread, games]
+            dead = [k for k, v in self._connections.items() if not v[1].is_alive()]
+
+        for key in dead:
+            self._close(key)
+
+        return connection
+
+    def close_all(self):
+        """ Close all analytics connections """
+        with self._lock:
+            keys = list(self._connections)
+
+        for key in keys:
+            self._close(key)
+
+    def _connect(self, games):
+        timeout = self._cfg.get("database", "timeout")
+        db_timeout = timeout if timeout else 5
+
+        global_path = os.path.join(os.getcwd(), con.DIR_DAT, con.FILE_DAT)
+
+        connection = sqlite3.connect(
+            f"file:{global_path}?mode=ro",
+            timeout=db_timeout,
+            check_same_thread=False,
+            uri=True)
+
+        try:
+            for game in games:
+                connection.execute("ATTACH DATABASE ? AS ?", (f"file:{self._game_path(game)}?mode=ro", game))
+
+            if games:
+                connection.execute(self._view("all_bets", "bets", self.BET_COLUMNS, games))
+                connection.execute(self._view("all_addresses", "addresses", self.ADDRESS_COLUMNS, games))
+        except Exception:
+            connection.close()
+            raise
+
+        logging.info(f"Analytics connection opened with games {games}")
+        return connection
+
+    def _view(self, name, table, columns, games):
+        """ Return statement that creates a TEMP view over a table of all games """
+        cols = ", ".join(columns)
+        union = " UNION ALL ".join(f"SELECT '{g}' AS game, {cols} FROM {g}.{table}" for g in games)
+        return f"CREATE TEMP VIEW {name} AS {union}"
+
+    def _game_path(self, game):
+        return os.path.join(os.getcwd(), con.DIR_SRC, con.DIR_PLG, game, con.DIR_DAT, f"{game}.db")
+
+    def _close(self, key):
+        with self._lock:
+            entry = self._connections.pop(key, None)
+
+        if entry:
+            try:
+                entry[0].close()
+            except Exception as e:
+                logging.warning(f"Can't close analytics connection {key}: {e}")
@@ -0,0 +1,99 @@
+import json
+import asyncio
+import logging
+import aiohttp
+
+from urllib.parse import urlparse
+from trxbetbot.transport import Transport
+from trxbetbot.eventloop import EventLoop
+from trxbetbot.ratelimit import RateLimiter
+
+
+class APIClient:
+    """
+    Base for clients of HTTP APIs like Trongrid and Tronscan.
+
+    Every request takes a token of the rate limiter for its host first and
+    sends the API key of the token (if there is one). Responses with status
+    429 take all tokens of the key. Connections are pooled by the transport.
+    """
+
+    def __init__(self, api_base_url, priority=RateLimiter.HIGH):
+        self.api_base_url = api_base_url
+        self.transport = Transport.shared()
+        self.limiter = RateLimiter.shared()
+        self.priority = priority
+
+    def _request(self, url):
+        host = urlparse(url).netloc
+
+        # Wait for a token or fail with RateLimitError
+        key = self.limiter.acquire(host, self.priority)
+
+        try:
+            response = self.transport.get(url, headers=self._headers(key))
+            content = self._content(host, key, response.status_code, response.content)
+            response.raise_for_status()
+            return content
+        except Exception as e:
+            logging.error(f"Error calling URL {url}: {e}")
+            raise e
+
+    def _url_params(self, api_url, params):
+        if params:
+            api_url += '?'
+            for key, value in params.items():
+                api_url += f"{key}={value}&"
+            api_url = api_url[:-1]
+        return api_url
+
+    def _headers(self, key):
+        return {RateLimiter.HEADER: key} if key else dict()
+
+    def _content(self, host, key, status, body):
+        """ Return decoded JSON of a response """
+        if status == 429:
+            self.limiter.throttle(host, key)
+
+        return json.loads(body.decode("utf-8"))
+
+
+class AsyncAPIClient(APIClient):
+    """ Same as 'APIClient' but for the shared event loop. Requests
+    don't block the loop while they wait for a token or the API """
+
+    def __init__(self, api_base_url, priority=RateLimiter.HIGH):
+        super().__init__(api_base_url, priority)
+        self.loop = EventLoop.shared()
+
+    async def _request(self, url):
+        uri = urlparse(url)
+
+        # Wait for a token or fail with RateLimitError
+        key = await self.limiter.acquire_async(uri.netloc, self.priority)
+
+        timeout = aiohttp.ClientTimeout(total=self.transport.get_timeout(uri))
+
+        try:
+            async with self.loop.session().get(url, headers=self._headers(key), timeout=timeout) as response:
+                content = self._content(uri.netloc, key, response.status, await response.read())
+                response.raise_for_status()
+                return content
+        except Exception as e:
+            logging.error(f"Error calling URL {url}: {e}")
+            raise e
+
+    async def _gather(self, items, fetch):
+        """ Return dict with result of 'fetch(item)' (or None on error) per
+        item. Up to 'concurrency' of the event loop run at the same time """
+        semaphore = asyncio.Semaphore(self.loop.concurrency)
+
+        async def fetch_one(item):
+            async with semaphore:
+                try:
+                    return await fetch(item)
+                except Exception:
+                    return None
+
+        results = await asyncio.gather(*[fetch_one(item) for item in items])
+        return dict(zip(items, results))
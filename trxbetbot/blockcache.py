@@ -0,0 +1,157 @@
+import os
+import json
+import logging
+import threading
+import trxbetbot.constants as con
+
+from collections import OrderedDict
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
+
+
+class LRUCache:
+    """ Thread-safe dictionary with a max size that drops the least recently used entries """
+
+    def __init__(self, size):
+        self._size = size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self._size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class BlockCache:
+    """
+    Process-wide cache for block IDs and transaction infos.
+
+    Solidified blocks and the infos of confirmed transactions never change,
+    so they only have to be fetched once from a node. If 'persist' is set,
+    everything is also saved to 'cache.db' and the most recent entries are
+    loaded again on startup.
+    """
+
+    def __init__(self, db: ConnectionManager, resources: ResourceCache, size=5000, persist=False):
+        self._db = db
+        self._res = resources
+        self._size = size
+        self._persist = persist
+
+        self._blocks = LRUCache(size)
+        self._infos = LRUCache(size)
+
+        self._db_path = os.path.join(os.getcwd(), con.DIR_DAT, con.FILE_CAC)
+
+        if self._persist:
+            try:
+                self._load()
+            except Exception as e:
+                logging.error(f"Can't load block cache: {e}")
+
+    def block_id(self, tron, number):
+        """ Return ID (hash) of block with given number """
+        block_id = self._blocks.get(number)
+
+        if block_id is None:
+            block = tron.re(tron.trx.get_block, number)
+            block_id = block["blockID"]
+            self.put_block(number, block_id)
+
+        return block_id
+
+    def transaction_info(self, tron, txid):
+        """ Return info of given transaction. Info is only
+        cached if the transaction is already in a block """
+        info = self._infos.get(txid)
+
+        if info is None:
+            info = tron.re(tron.trx.get_transaction_info, txid)
+
+            if "blockNumber" in info:
+                self.put_transaction_info(txid, info)
+
+        return info
+
+    def get_transaction_info(self, txid):
+        """ Return cached info of given transaction or None """
+        return self._infos.get(txid)
+
+    def put_block(self, number, block_id):
+        """ Add ID of an already fetched block """
+        self._blocks.put(number, block_id)
+
+        if self._persist:
+            self._save("insert_cache_block.sql", number, block_id)
+
+    def put_transaction_info(self, txid, info):
+        """ Add an already fetched transaction info """
+        self._infos.put(txid, info)
+
+        if self._persist:
+            self._save("insert_cache_transaction.sql", txid, json.dumps(info))
+
+    def stats(self):
+        """ Return number of cached entries and hit rates """
+        stats = dict()
+
+        for name, cache in [("blocks", self._blocks), ("infos", self._infos)]:
+            total = cache.hits + cache.misses
+            stats[name] = {
+                "cached": len(cache),
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "rate": round(cache.hits / total * 100) if total else 0
+            }
+
+        return stats
+
+    def _load(self):
+        os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+
+        self._db.execute(self._db_path, self._get_sql("create_cache_blocks.sql"))
+        self._db.execute(self._db_path, self._get_sql("create_cache_transactions.sql"))
+
+        # Only keep as many entries as the cache can hold
+        self._db.execute(self._db_path, self._get_sql("delete_cache_blocks.sql"), self._size)
+        self._db.execute(self._db_path, self._get_sql("delete_cache_transactions.sql"), self._size)
+
+        blocks = self._db.execute(self._db_path, self._get_sql("select_cache_blocks.sql"), self._size)
+        for number, block_id in reversed(blocks):
+            self._blocks.put(number, block_id)
+
+        infos = self._db.execute(self._db_path, self._get_sql("select_cache_transactions.sql"), self._size)
+        for txid, info in reversed(infos):
+            self._infos.put(txid, json.loads(info))
+
+        logging.info(f"Loaded {len(blocks)} blocks and {len(infos)} transaction infos into block cache")
+
+    def _save(self, filename, *args):
+        try:
+            self._db.execute(self._db_path, self._get_sql(filename), *args)
+        except Exception as e:
+            logging.warning(f"Can't save to block cache: {e}")
+
+    def _get_sql(self, filename):
+        return self._res.read(os.path.join(os.getcwd(), con.DIR_RES, filename))
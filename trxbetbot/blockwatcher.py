@@ -0,0 +1,128 @@
+import logging
+import threading
+
+from tronapi.main import Address
+from trxbetbot.trxapi import TRXAPI
+from trxbetbot.registry import BetRegistry
+from trxbetbot.blockcache import BlockCache
+
+
+class BlockWatcher(threading.Thread):
+    """
+    Follows the solidified blocks of the Tron blockchain.
+
+    Every new block is fetched only once and all TRX transfers in it are
+    matched against the addresses of the pending bets in the registry. If a
+    transfer to such an address is found, 'handler' gets called with the
+    pending bet and the details of the transfer. Blocks are only fetched if
+    there are pending bets. Expired bets are removed from the registry and
+    IDs of fetched blocks are added to the block cache.
+    """
+
+    def __init__(self, registry: BetRegistry, blocks: BlockCache, handler, interval=3, max_blocks=20):
+        super().__init__(name="BlockWatcher", daemon=True)
+
+        self._tron = TRXAPI()
+        self._registry = registry
+        self._blocks = blocks
+        self._handler = handler
+        self._interval = interval
+        self._max_blocks = max_blocks
+        self._stopped = threading.Event()
+
+        # Number of last processed block
+        self.block = None
+
+        self.blocks = 0
+        self.matches = 0
+        self.errors = 0
+
+    def stop(self):
+        """ Stop following blocks """
+        self._stopped.set()
+
+    def run(self):
+        logging.info("Block watcher started")
+
+        while not self._stopped.wait(self._interval):
+            try:
+                self._registry.expire()
+                self._follow()
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Block watcher can't process blocks: {e}")
+
+        logging.info("Block watcher stopped")
+
+    def stats(self):
+        """ Return last processed block and counters """
+        return {
+            "block": self.block,
+            "watched": len(self._registry),
+            "blocks": self.blocks,
+            "matches": self.matches,
+            "errors": self.errors
+        }
+
+    def _follow(self):
+        now = self._tron.re(self._tron.manager.request, "/walletsolidity/getnowblock")
+        latest = now["block_header"]["raw_data"]["number"]
+
+        # Nothing to match. Don't fetch blocks in between
+        if not len(self._registry) or self.block is None:
+            self.block = latest
+            return
+
+        # Transfers in skipped blocks will be found by polling
+        first = max(self.block + 1, latest - self._max_blocks + 1)
+
+        for number in range(first, latest + 1):
+            if number == latest:
+                block = now
+            else:
+                block = self._tron.re(
+                    self._tron.manager.request,
+                    "/walletsolidity/getblockbynum",
+                    {"num": number})
+
+            self._blocks.put_block(number, block["blockID"])
+            self._match(number, block)
+
+            self.block = number
+            self.blocks += 1
+
+    def _match(self, number, block):
+        for trx in block.get("transactions", []):
+            ret = trx.get("ret", [{}])[0]
+
+            # Only successful transactions
+            if ret.get("contractRet", "SUCCESS") != "SUCCESS":
+                continue
+
+            contract = trx["raw_data"]["contract"][0]
+
+            # Only TRX transfers
+            if contract["type"] != "TransferContract":
+                continue
+
+            value = contract["parameter"]["value"]
+
+            bet = self._registry.get(value["to_address"])
+
+            if not bet:
+                continue
+
+            self.matches += 1
+
+            transfer = {
+                "txid": trx["txID"],
+                "from": Address().from_hex(value["owner_address"]).decode(),
+                "amount": value["amount"],
+                "block": number,
+                "block_hash": block["blockID"]
+            }
+
+            try:
+                self._handler(bet, transfer)
+            except Exception as e:
+                logging.error(f"Block watcher can't hand over transfer {transfer}: {e}")
@@ -0,0 +1,151 @@
+import os
+import time
+import logging
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.config import ConfigManager as Cfg
+from requests.exceptions import ConnectionError
+
+
+class CircuitOpenError(ConnectionError):
+    """ Raised instead of sending a request to a node with an open circuit """
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a node after 'failures' failed requests in a row.
+
+    After 'reset_after' seconds one request is let through again. If it
+    works, the circuit gets closed. Otherwise it stays open for another
+    'reset_after' seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failures=5, reset_after=30):
+        self._failures = failures
+        self._reset_after = reset_after
+        self._lock = threading.Lock()
+
+        self.state = self.CLOSED
+        self.failed = 0
+        self.opened = 0
+        self.opened_at = None
+
+    def allow(self):
+        """ Return TRUE if a request can be sent """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and (time.time() - self.opened_at) >= self._reset_after:
+                # Let one request through
+                self.state = self.HALF_OPEN
+                return True
+
+            return False
+
+    def is_open(self):
+        """ Return TRUE if requests are currently stopped """
+        with self._lock:
+            if self.state == self.OPEN:
+                return (time.time() - self.opened_at) < self._reset_after
+            return self.state == self.HALF_OPEN
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failed = 0
+
+    def failure(self):
+        """ Return TRUE if the circuit got opened """
+        with self._lock:
+            self.failed += 1
+
+            if self.state == self.HALF_OPEN or self.failed >= self._failures:
+                opened = self.state != self.OPEN
+
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+                if opened:
+                    self.opened += 1
+                return opened
+
+            return False
+
+
+class CircuitBreakers:
+    """ Process-wide circuit breakers, one per node """
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, enabled=True, failures=5, reset_after=30):
+        self._enabled = enabled
+        self._failures = failures
+        self._reset_after = reset_after
+        self._lock = threading.Lock()
+
+        # Node URL -> breaker
+        self._breakers = dict()
+
+        self.rejected = 0
+
+    @classmethod
+    def shared(cls):
+        """ Return circuit breakers that are shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                cls._shared = CircuitBreakers(
+                    enabled=bool(cls.cfg.get("circuit_breaker", "enabled")),
+                    failures=cls.cfg.get("circuit_breaker", "failures") or 5,
+                    reset_after=cls.cfg.get("circuit_breaker", "reset_after") or 30)
+            return cls._shared
+
+    def get(self, node) -> CircuitBreaker:
+        """ Return breaker of given node """
+        node = node.rstrip("/")
+
+        with self._lock:
+            if node not in self._breakers:
+                self._breakers[node] = CircuitBreaker(self._failures, self._reset_after)
+            return self._breakers[node]
+
+    def allow(self, node):
+        """ Return TRUE if a request to given node can be sent """
+        if not self._enabled or self.get(node).allow():
+            return True
+
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def is_open(self, node):
+        """ Return TRUE if requests to given node are stopped """
+        return self._enabled and self.get(node).is_open()
+
+    def success(self, node):
+        if self._enabled:
+            self.get(node).success()
+
+    def failure(self, node):
+        if self._enabled and self.get(node).failure():
+            logging.warning(f"Circuit breaker: Stopped requests to {node}")
+
+    def stats(self):
+        """ Return nodes with open circuit and counters """
+        with self._lock:
+            breakers = dict(self._breakers)
+            rejected = self.rejected
+
+        return {
+            "open": [node for node, breaker in breakers.items() if breaker.is_open()],
+            "opened": sum(breaker.opened for breaker in breakers.values()),
+            "rejected": rejected
+        }
@@ -0,0 +1,156 @@
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+from trxbetbot.blockcache import BlockCache
+
+
+class ConfirmationResolver:
+    """
+    Resolves transaction infos of many pending bets together.
+
+    Instead of asking a node for the info of every single transaction, the
+    infos of all transactions in a solidified block are fetched with one call
+    and kept for the last 'max_blocks' blocks. All pending transactions that
+    are in one of these blocks get resolved from there. A transaction is only
+    looked up on its own when it's requested for the first time (it could be
+    older than the kept blocks) or if it didn't show up in 'max_blocks' blocks.
+    New blocks are fetched by one caller at a time without blocking the others.
+    """
+
+    def __init__(self, blocks: BlockCache, enabled=True, max_blocks=20, interval=3):
+        self._cache = blocks
+        self._enabled = enabled
+        self._max_blocks = max_blocks
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+
+        # Block number -> {txid: info}
+        self._recent = OrderedDict()
+
+        # TXID -> last processed block when it was requested first
+        self._pending = dict()
+
+        # Number of last processed block
+        self._block = None
+        self._scanned = 0
+
+        self.blocks = 0
+        self.resolved = 0
+        self.single = 0
+
+    def transaction_info(self, tron, txid):
+        """ Return info of given transaction or an empty dict if
+        the transaction is not in a solidified block yet """
+        if not self._enabled:
+            return self._cache.transaction_info(tron, txid)
+
+        info = self._cache.get_transaction_info(txid)
+
+        if info:
+            return info
+
+        # Only one caller fetches new blocks, the others use the kept ones
+        if (time.time() - self._scanned) >= self._interval and self._scan_lock.acquire(blocking=False):
+            try:
+                self._scan(tron)
+            except Exception as e:
+                logging.warning(f"Can't retrieve latest solidified block: {e}")
+            finally:
+                self._scan_lock.release()
+
+        with self._lock:
+            info = self._find(txid)
+
+            if info:
+                self._pending.pop(txid, None)
+                self.resolved += 1
+                self._cache.put_transaction_info(txid, info)
+                return info
+
+            first = txid not in self._pending
+            added = self._pending.setdefault(txid, self._block)
+
+            # Transaction will show up in one of the next blocks
+            waiting = added is not None and self._block is not None and (self._block - added) < self._max_blocks
+
+            # Otherwise it could be older than the kept blocks or blocks were skipped
+            if not first and waiting:
+                return dict()
+
+            self._pending[txid] = self._block
+
+        self.single += 1
+        info = self._cache.transaction_info(tron, txid)
+
+        if "blockNumber" in info:
+            with self._lock:
+                self._pending.pop(txid, None)
+
+        return info
+
+    def stats(self):
+        """ Return number of fetched blocks and resolved transactions """
+        with self._lock:
+            pending = len(self._pending)
+
+        return {
+            "pending": pending,
+            "blocks": self.blocks,
+            "resolved": self.resolved,
+            "single": self.single
+        }
+
+    def _scan(self, tron):
+        """ Fetch transaction infos of new solidified blocks without
+        holding the lock and add them to the kept blocks at the end """
+        self._scanned = time.time()
+
+        now = tron.re(tron.manager.request, "/walletsolidity/getnowblock")
+        latest = now["block_header"]["raw_data"]["number"]
+
+        first = latest - self._max_blocks + 1
+        if self._block is not None:
+            first = max(self._block + 1, first)
+
+        recent = OrderedDict()
+
+        for number in range(first, latest + 1):
+            try:
+                infos = tron.re(tron.manager.request, "/walletsolidity/gettransactioninfobyblocknum", {"num": number})
+            except Exception as e:
+                logging.warning(f"Can't retrieve transaction infos of block {number}: {e}")
+                break
+
+            # Blocks without transactions return an empty object
+            if not isinstance(infos, list):
+                infos = list()
+
+            recent[number] = {info["id"]: info for info in infos if "id" in info}
+
+        if not recent:
+            return
+
+        with self._lock:
+            self._recent.update(recent)
+
+            while len(self._recent) > self._max_blocks:
+                self._recent.popitem(last=False)
+
+            self._block = next(reversed(recent))
+            self.blocks += len(recent)
+
+            # Transactions that weren't requested again in 'max_blocks' blocks
+            expired = [txid for txid, added in self._pending.items()
+                       if added is None or (self._block - added) > self._max_blocks]
+
+            for txid in expired:
+                del self._pending[txid]
+
+    def _find(self, txid):
+        for infos in self._recent.values():
+            if txid in infos:
+                return infos[txid]
+        return None
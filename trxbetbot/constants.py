@@ -14,9 +14,12 @@ DIR_CFG = "config"
 DIR_LOG = "logs"
 DIR_DAT = "data"
 DIR_TMP = "temp"
+DIR_MIG = "migrations"
+DIR_GLB = "global"
 
 # Project files
 FILE_DAT = "global.db"
+FILE_CAC = "cache.db"
 FILE_CFG = "config.json"
 FILE_TKN = "token.json"
 FILE_TRX = "wallet.json"
@@ -0,0 +1,538 @@
+import os
+import re
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+from concurrent.futures import Future
+from trxbetbot.config import ConfigManager
+
+
+class ConnectionManager:
+    """
+    Keeps one long-lived SQLite connection per thread and database file.
+
+    Connections are created lazily on first use, reused for every following
+    statement from the same thread, checked for health if they were idle for
+    a while and closed once the thread that owns them is gone.
+    """
+
+    # Seconds a connection can be idle before it gets checked again
+    CHECK_AFTER = 60
+
+    # Allowed values for PRAGMAs that can't be checked as integers
+    JOURNAL_MODES = ["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]
+    SYNC_LEVELS = ["OFF", "NORMAL", "FULL", "EXTRA"]
+
+    # Statements starting with these keywords only read. Everything
+    # else (like VACUUM or ATTACH) will be handled by the writer
+    READ_KEYWORDS = ("SELECT", "VALUES", "EXPLAIN")
+    # Statements starting with these keywords change the schema
+    DDL_KEYWORDS = ("CREATE", "DROP", "ALTER")
+    # Keywords that can follow the common table expressions of WITH
+    CTE_KEYWORDS = ("SELECT", "VALUES", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+    # Parts of statements that don't matter to find the statement type
+    LITERAL = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+    COMMENT = re.compile(r"--[^\n]*|/\*.*?(?:\*/|$)", re.DOTALL)
+    BRACKETS = re.compile(r"\([^()]*\)")
+
+    SELECT_TABLES = "SELECT name FROM sqlite_master WHERE type = 'table'"
+
+    # Upper limit for rows that will be fetched at once
+    MAX_PAGE_SIZE = 1000
+    # Allowed names for columns used in generated statements
+    IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def __init__(self, config: ConfigManager):
+        self._cfg = config
+        self._lock = threading.Lock()
+
+        # (thread ID, database path) -> [connection, thread, last used]
+        self._connections = dict()
+
+        # Database path -> DatabaseWriter
+        self._writers = dict()
+
+        # Database path -> set of table names
+        self._tables = dict()
+
+        self.opened = 0
+        self.reused = 0
+
+    def get(self, db_path):
+        """ Return the connection of the current thread for the given database """
+        thread = threading.current_thread()
+        key = (thread.ident, db_path)
+
+        with self._lock:
+            entry = self._connections.get(key)
+
+        if entry:
+            con, owner, last_used = entry
+
+            # Thread IDs can be recycled after a thread finished
+            if owner is thread and self._is_healthy(con, db_path, last_used):
+                entry[2] = time.time()
+                self.reused += 1
+                return con
+
+            self._close(key)
+
+        con = self._connect(db_path)
+
+        with self._lock:
+            self._connections[key] = [con, thread, time.time()]
+            self.opened += 1
+
+        self.prune()
+        return con
+
+    def execute(self, db_path, sql, *args):
+        """ Execute SQL statement on given database and return fetched rows """
+        try:
+            if self._cfg.get("database", "single_writer") and self.is_write(sql):
+                timeout = self._cfg.get("database", "writer_timeout") or 30
+                return self.get_writer(db_path).submit(sql, *args).result(timeout=timeout)
+
+            con = self.get(db_path)
+            cur = con.cursor()
+
+            try:
+                cur.execute(sql, args)
+                data = cur.fetchall()
+                con.commit()
+                return data
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                cur.close()
+        finally:
+            if self.keyword(sql) in self.DDL_KEYWORDS:
+                self.invalidate(db_path)
+
+    def iterate(self, db_path, sql, *args, page_size=100):
+        """ Execute SQL statement on given database and return a generator
+        that yields lists of at most 'page_size' rows until all are fetched """
+        page_size = max(1, min(int(page_size), self.MAX_PAGE_SIZE))
+
+        con = self.get(db_path)
+        cur = con.cursor()
+
+        try:
+            cur.execute(sql, args)
+
+            while True:
+                rows = cur.fetchmany(page_size)
+
+                if not rows:
+                    break
+
+                yield rows
+
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def page(self, db_path, table, key_column, after=None, limit=100):
+        """ Return a tuple with at most 'limit' rows of given table ordered by
+        'key_column' and starting after key 'after'. Second value of the tuple
+        is the key to use for the next page or None if there is no next page """
+        if table not in self.tables(db_path):
+            raise ValueError(f"Table '{table}' doesn't exist")
+        if not self.IDENTIFIER.match(key_column):
+            raise ValueError(f"Column '{key_column}' not valid")
+
+        limit = max(1, min(int(limit), self.MAX_PAGE_SIZE))
+
+        if after is None:
+            sql = f"SELECT * FROM {table} ORDER BY {key_column} LIMIT ?"
+            args = (limit,)
+        else:
+            sql = f"SELECT * FROM {table} WHERE {key_column} > ? ORDER BY {key_column} LIMIT ?"
+            args = (after, limit)
+
+        con = self.get(db_path)
+        cur = con.cursor()
+
+        try:
+            cur.execute(sql, args)
+            rows = cur.fetchall()
+            columns = [d[0] for d in cur.description]
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            cur.close()
+
+        if len(rows) < limit:
+            return rows, None
+
+        return rows, rows[-1][columns.index(key_column)]
+
+    def tables(self, db_path):
+        """ Return names of all tables in given database. The schema
+        will be read once and is then kept until it gets invalidated """
+        if not os.path.isfile(db_path):
+            self.invalidate(db_path)
+            return set()
+
+        with self._lock:
+            tables = self._tables.get(db_path)
+
+        if tables is None:
+            tables = {row[0] for row in self.get(db_path).execute(self.SELECT_TABLES)}
+
+            with self._lock:
+                self._tables[db_path] = tables
+
+        return tables
+
+    def invalidate(self, db_path):
+        """ Forget the cached schema of given database """
+        with self._lock:
+            self._tables.pop(db_path, None)
+
+    def is_write(self, sql):
+        """ Return TRUE if given statement can change the database.
+        Only plain reads (and PRAGMAs without value) are not writes """
+        keyword = self.keyword(sql)
+
+        if keyword == "PRAGMA":
+            return "=" in self._strip(sql) or self.BRACKETS.search(self._strip(sql)) is not None
+
+        return keyword not in self.READ_KEYWORDS
+
+    def keyword(self, sql):
+        """ Return first keyword of given statement without comments. For
+        statements with common table expressions (WITH) the keyword of
+        the statement that follows them will be returned """
+        statement = self._strip(sql)
+
+        # Remove content of brackets, like the common table expressions
+        while True:
+            stripped = self.BRACKETS.sub(" ", statement)
+            if stripped == statement:
+                break
+            statement = stripped
+
+        words = statement.upper().split()
+
+        if not words:
+            return str()
+
+        if words[0] == "WITH":
+            for word in words[1:]:
+                if word in self.CTE_KEYWORDS:
+                    return word
+
+        return words[0]
+
+    def get_writer(self, db_path):
+        """ Return the writer thread for given database and start it if needed """
+        with self._lock:
+            writer = self._writers.get(db_path)
+
+            if not writer or not writer.is_alive():
+                batch_size = self._cfg.get("database", "writer_batch")
+                writer = DatabaseWriter(self, db_path, batch_size if batch_size else 100)
+                writer.start()
+
+                self._writers[db_path] = writer
+
+        return writer
+
+    def prune(self):
+        """ Close all connections that belong to threads that are not alive anymore """
+        with self._lock:
+            dead = [k for k, v in self._connections.items() if not v[1].is_alive()]
+
+        for key in dead:
+            self._close(key)
+
+    def release(self, db_path):
+        """ Close the connection of the current thread to the given database """
+        self._close((threading.current_thread().ident, db_path))
+
+    def close(self, db_path):
+        """ Close all connections to the given database """
+        with self._lock:
+            keys = [k for k in self._connections if k[1] == db_path]
+
+        for key in keys:
+            self._close(key)
+
+    def close_all(self):
+        """ Stop all writers and close all connections. Used on shutdown and restart """
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+
+        for writer in writers:
+            writer.stop()
+
+        with self._lock:
+            keys = list(self._connections)
+
+        for key in keys:
+            self._close(key)
+
+        logging.info(f"Closed {len(keys)} database connections")
+
+    def stats(self):
+        """ Return statistics about opened and reused connections """
+        with self._lock:
+            open_con = len(self._connections)
+            writers = list(self._writers.values())
+
+        return {
+            "open": open_con,
+            "opened": self.opened,
+            "reused": self.reused,
+            "written": sum(w.statements for w in writers),
+            "transactions": sum(w.transactions for w in writers)
+        }
+
+    def profile(self, db_path):
+        """ Return the effective performance settings of the given database """
+        con = self.get(db_path)
+
+        sync = con.execute("PRAGMA synchronous").fetchone()[0]
+
+        return {
+            "journal_mode": con.execute("PRAGMA journal_mode").fetchone()[0],
+            "synchronous": self.SYNC_LEVELS[sync] if sync < len(self.SYNC_LEVELS) else sync,
+            "cache_size": con.execute("PRAGMA cache_size").fetchone()[0],
+            "mmap_size": con.execute("PRAGMA mmap_size").fetchone()[0],
+            "busy_timeout": con.execute("PRAGMA busy_timeout").fetchone()[0]
+        }
+
+    def _connect(self, db_path):
+        timeout = self._cfg.get("database", "timeout")
+        db_timeout = timeout if timeout else 5
+
+        # Connection will only be used by one thread but
+        # can be closed from another one while pruning
+        con = sqlite3.connect(db_path, timeout=db_timeout, check_same_thread=False)
+
+        try:
+            self._apply_profile(con)
+        except sqlite3.Error as e:
+            logging.error(f"Can't apply database profile to {db_path}: {e}")
+
+        return con
+
+    def _apply_profile(self, con):
+        """ Set PRAGMAs from the 'profile' section of the database config """
+        profile = self._cfg.get("database", "profile")
+
+        if not profile:
+            return
+
+        journal_mode = str(profile.get("journal_mode", "")).upper()
+        if journal_mode in self.JOURNAL_MODES:
+            con.execute(f"PRAGMA journal_mode = {journal_mode}")
+
+        synchronous = str(profile.get("synchronous", "")).upper()
+        if synchronous in self.SYNC_LEVELS:
+            con.execute(f"PRAGMA synchronous = {synchronous}")
+
+        for pragma in ["cache_size", "mmap_size", "busy_timeout"]:
+            value = profile.get(pragma)
+            if isinstance(value, int):
+                con.execute(f"PRAGMA {pragma} = {value}")
+
+    def _strip(self, sql):
+        """ Return statement without literals and comments """
+        return self.COMMENT.sub(" ", self.LITERAL.sub("''", sql))
+
+    def _close(self, key):
+        with self._lock:
+            entry = self._connections.pop(key, None)
+
+        if entry:
+            try:
+                entry[0].close()
+            except Exception as e:
+                logging.warning(f"Can't close database connection {key}: {e}")
+
+    def _is_healthy(self, con, db_path, last_used):
+        # Database file was removed while connection was open
+        if not os.path.isfile(db_path):
+            return False
+
+        if (time.time() - last_used) < self.CHECK_AFTER:
+            return True
+
+        try:
+            con.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logging.warning(f"Database connection to {db_path} not healthy: {e}")
+            return False
+
+
+class DatabaseWriter(threading.Thread):
+    """
+    Single thread that executes all writing statements for one database file.
+
+    Statements are taken from a queue and grouped into one transaction with
+    up to 'batch_size' statements. Every statement runs inside its own
+    savepoint so that a failing statement doesn't affect the others. Results
+    are returned to the callers through futures after the commit. If the
+    transaction itself fails, all statements of it fail and the thread
+    continues with a new connection. Statements that can't run inside a
+    transaction (like VACUUM) are executed on their own between batches.
+    """
+
+    # Statements that SQLite doesn't allow inside a transaction
+    NO_TRANSACTION = ("VACUUM", "ATTACH", "DETACH")
+
+    def __init__(self, manager: ConnectionManager, db_path, batch_size=100):
+        super().__init__(name=f"DatabaseWriter {os.path.basename(db_path)}", daemon=True)
+
+        self._manager = manager
+        self._db_path = db_path
+        self._batch_size = batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = False
+
+        self.statements = 0
+        self.transactions = 0
+
+    def submit(self, sql, *args) -> Future:
+        """ Queue statement for execution and return future for its result.
+        Raises sqlite3.OperationalError if the writer was stopped """
+        future = Future()
+
+        with self._lock:
+            if self._stopped:
+                raise sqlite3.OperationalError(f"Database writer for {self._db_path} is stopped")
+
+            self._queue.put((sql, args, future))
+
+        return future
+
+    def stop(self):
+        """ Execute everything that is queued and end the thread """
+        with self._lock:
+            self._stopped = True
+            self._queue.put(None)
+
+        self.join(timeout=10)
+
+    def run(self):
+        running = True
+
+        while running:
+            batch = [self._queue.get()]
+
+            # Collect everything that is already waiting
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                batch = [item for item in batch if item]
+                running = False
+
+            if batch:
+                self._write(batch)
+
+        self._manager.release(self._db_path)
+
+    def _write(self, batch):
+        group = list()
+
+        for item in batch:
+            if self._manager.keyword(item[0]) in self.NO_TRANSACTION:
+                self._run(self._transaction, group)
+                self._run(self._single, [item])
+                group = list()
+            else:
+                group.append(item)
+
+        self._run(self._transaction, group)
+
+    def _run(self, write, batch):
+        if not batch:
+            return
+
+        try:
+            write(batch)
+        except Exception as e:
+            logging.error(f"Database writer for {self._db_path} failed: {e}")
+
+            try:
+                self._manager.get(self._db_path).rollback()
+            except Exception as ex:
+                logging.error(f"Database writer for {self._db_path} can't roll back: {ex}")
+
+            # Connection might be broken
+            self._manager.release(self._db_path)
+
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _single(self, batch):
+        """ Execute statement without transaction """
+        sql, args, future = batch[0]
+        con = self._manager.get(self._db_path)
+
+        try:
+            result = con.execute(sql, args).fetchall()
+        except sqlite3.Error as e:
+            future.set_exception(e)
+            return
+
+        self.statements += 1
+        future.set_result(result)
+
+    def _transaction(self, batch):
+        results = list()
+
+        try:
+            con = self._manager.get(self._db_path)
+            con.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for sql, args, future in batch:
+            try:
+                con.execute("SAVEPOINT statement")
+                results.append((future, con.execute(sql, args).fetchall()))
+                con.execute("RELEASE statement")
+            except Exception as e:
+                con.execute("ROLLBACK TO statement")
+                con.execute("RELEASE statement")
+                results.append((future, e))
+
+        try:
+            con.commit()
+        except Exception as e:
+            con.rollback()
+            for future, _ in results:
+                future.set_exception(e)
+            return
+
+        self.statements += len(batch)
+        self.transactions += 1
+
+        for future, result in results:
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,86 @@
+import os
+import asyncio
+import logging
+import aiohttp
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.config import ConfigManager as Cfg
+
+
+class EventLoop(threading.Thread):
+    """
+    Process-wide asyncio event loop in its own thread.
+
+    Synchronous code (like plugins) can run coroutines on it with 'call()'
+    and wait for the result. All coroutines share one aiohttp session with
+    up to 'pool_size' connections, so hundreds of requests can run at the
+    same time without a thread per request. Clients that fan out requests
+    run up to 'concurrency' of them at once. The loop starts with the first
+    call.
+    """
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size=100, concurrency=20, timeout=300):
+        super().__init__(name="EventLoop", daemon=True)
+
+        self.concurrency = concurrency
+
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        self._session = None
+
+    @classmethod
+    def shared(cls):
+        """ Return event loop that is shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                cls._shared = EventLoop(
+                    pool_size=cls.cfg.get("async", "pool_size") or 100,
+                    concurrency=cls.cfg.get("async", "concurrency") or 20,
+                    timeout=cls.cfg.get("async", "timeout") or 300)
+            return cls._shared
+
+    def call(self, coro, timeout=None):
+        """ Run coroutine on the loop and return its result """
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return future.result(timeout or self._timeout)
+
+    def session(self) -> aiohttp.ClientSession:
+        """ Return the shared session. Only call it from the loop """
+        if not self._session:
+            connector = aiohttp.TCPConnector(limit=self._pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def stop(self):
+        """ Close the session and stop the loop """
+        with self._lock:
+            if not self.is_alive():
+                return
+
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def run(self):
+        logging.info("Event loop started")
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+        logging.info("Event loop stopped")
+
+    async def _close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+import trxbetbot.constants as con
+
+from collections import deque
+from trxbetbot.config import ConfigManager as Cfg
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Hedging:
+    """
+    Sends idempotent reads to a second node if the first one is slow.
+
+    If the first call didn't return after the configured 'percentile' of the
+    latencies of the last 'samples' calls (but at least 'min_delay' and at
+    most 'max_delay' seconds), the same call is sent to a second node and the
+    first successful result is used. Only functions in 'functions' will be
+    hedged. Calls run in a pool of 'workers' threads. If all of them are busy,
+    calls run in the thread of the caller without hedging instead of waiting.
+    """
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, enabled=True, functions=None, percentile=95, min_delay=0.2,
+                 max_delay=5, samples=200, workers=10):
+        self._enabled = enabled
+        self._functions = set(functions or list())
+        self._percentile = percentile
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+
+        # Number of calls in the pool
+        self._running = 0
+
+        # Latencies of the last calls
+        self._latencies = deque(maxlen=samples)
+
+        self.calls = 0
+        self.hedged = 0
+        self.won = 0
+        self.bypassed = 0
+
+    @classmethod
+    def shared(cls):
+        """ Return hedging that is shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                cls._shared = Hedging(
+                    enabled=bool(cls.cfg.get("hedging", "enabled")),
+                    functions=cls.cfg.get("hedging", "functions"),
+                    percentile=cls.cfg.get("hedging", "percentile") or 95,
+                    min_delay=cls.cfg.get("hedging", "min_delay") or 0.2,
+                    max_delay=cls.cfg.get("hedging", "max_delay") or 5,
+                    samples=cls.cfg.get("hedging", "samples") or 200,
+                    workers=cls.cfg.get("hedging", "workers") or 10)
+            return cls._shared
+
+    def is_hedged(self, fun):
+        """ Return TRUE if calls of given function can be hedged """
+        return self._enabled and fun.__name__ in self._functions
+
+    def delay(self):
+        """ Return seconds to wait for the first call before hedging """
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if not latencies:
+            return self._max_delay
+
+        index = min(int(len(latencies) * self._percentile / 100), len(latencies) - 1)
+        return min(max(latencies[index], self._min_delay), self._max_delay)
+
+    def call(self, fun, hedge, *args, **kwargs):
+        """ Execute 'fun' and if it's too slow also the function that
+        'hedge()' returns. Return the first successful result """
+        start = time.time()
+
+        with self._lock:
+            self.calls += 1
+
+        primary = self._submit(fun, *args, **kwargs)
+
+        # Pool is busy
+        if not primary:
+            with self._lock:
+                self.bypassed += 1
+            return fun(*args, **kwargs)
+
+        done, _ = wait([primary], timeout=self.delay())
+
+        if done:
+            return self._result(primary, start)
+
+        second = hedge()
+
+        # No other node available
+        if not second:
+            return self._result(primary, start)
+
+        secondary = self._submit(second, *args, **kwargs)
+
+        # Pool is busy
+        if not secondary:
+            return self._result(primary, start)
+
+        with self._lock:
+            self.hedged += 1
+
+        pending = {primary, secondary}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    if future is secondary:
+                        with self._lock:
+                            self.won += 1
+                    return self._result(future, start)
+
+        # Both failed
+        return primary.result()
+
+    def stats(self):
+        """ Return current delay and counters """
+        with self._lock:
+            calls, hedged, won, bypassed = self.calls, self.hedged, self.won, self.bypassed
+
+        return {
+            "delay": round(self.delay(), 2),
+            "calls": calls,
+            "hedged": hedged,
+            "won": won,
+            "bypassed": bypassed
+        }
+
+    def _submit(self, fun, *args, **kwargs):
+        """ Run function in the pool and return its future
+        or None if all threads of the pool are busy """
+        with self._lock:
+            if self._running >= self._workers:
+                return None
+            self._running += 1
+
+        future = self._executor.submit(fun, *args, **kwargs)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._running -= 1
+
+    def _result(self, future, start):
+        result = future.result()
+
+        with self._lock:
+            self._latencies.append(time.time() - start)
+
+        return result
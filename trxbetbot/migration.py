@@ -0,0 +1,109 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
+
+
+class Migrator:
+    """
+    Applies numbered SQL migrations to a database file.
+
+    Migration files are named '<version>_<description>.sql' (for example
+    '001_add_indexes.sql') and can hold more than one statement. The highest
+    applied version is saved per plugin in the 'migrations' table of every
+    database file, so running the same migrations again doesn't change anything.
+    """
+
+    FILE_PATTERN = re.compile(r"^(\d+)_\w+\.sql$")
+
+    _lock = threading.Lock()
+
+    def __init__(self, db: ConnectionManager, resources: ResourceCache):
+        self._db = db
+        self._res = resources
+
+    def version(self, db_path, plugin):
+        """ Return highest applied migration version of plugin in given database """
+        self._db.execute(db_path, self._get_sql("create_migrations.sql"))
+        res = self._db.execute(db_path, self._get_sql("select_migration.sql"), plugin)
+        return res[0][0] if res and res[0][0] else 0
+
+    def migrate(self, db_path, plugin, directory):
+        """ Apply all migrations from given directory that are newer than the
+        current version. Return number of applied migrations """
+        if not os.path.isdir(directory):
+            return 0
+
+        migrations = list()
+        for file in os.listdir(directory):
+            match = self.FILE_PATTERN.match(file)
+            if match:
+                migrations.append((int(match.group(1)), file))
+
+        if not migrations:
+            return 0
+
+        applied = 0
+
+        with self._lock:
+            current = self.version(db_path, plugin)
+
+            for version, file in sorted(migrations):
+                if version <= current:
+                    continue
+
+                path = os.path.join(directory, file)
+
+                try:
+                    self._apply(db_path, plugin, version, file, self._res.read(path))
+                except Exception as e:
+                    logging.error(f"Migration '{file}' of plugin '{plugin}' failed: {e}")
+                    raise e
+                finally:
+                    # Migrations can change the schema
+                    self._db.invalidate(db_path)
+
+                applied += 1
+                logging.info(f"Migration '{file}' of plugin '{plugin}' applied to {db_path}")
+
+        return applied
+
+    def _apply(self, db_path, plugin, version, name, script):
+        """ Execute all statements of a migration and save its version in one transaction """
+        con = self._db.get(db_path)
+
+        try:
+            con.execute("BEGIN")
+
+            for statement in self._split(script):
+                con.execute(statement)
+
+            con.execute(self._get_sql("insert_migration.sql"), (plugin, version, name))
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+    def _split(self, script):
+        """ Split SQL script into single complete statements """
+        statements = list()
+        statement = str()
+
+        for line in script.splitlines(keepends=True):
+            statement += line
+            if sqlite3.complete_statement(statement):
+                statements.append(statement.strip())
+                statement = str()
+
+        if statement.strip():
+            statements.append(statement.strip())
+
+        return statements
+
+    def _get_sql(self, filename):
+        return self._res.read(os.path.join(os.getcwd(), con.DIR_RES, filename))
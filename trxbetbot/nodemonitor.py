@@ -0,0 +1,175 @@
+import os
+import time
+import logging
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.transport import Transport
+from trxbetbot.config import ConfigManager as Cfg
+from concurrent.futures import ThreadPoolExecutor
+
+
+class NodeMonitor(threading.Thread):
+    """
+    Measures latency and block height of all configured Tron nodes.
+
+    Every 'interval' seconds all full nodes and solidity nodes (the default
+    node and the nodes from 'full_node_list' and 'solidity_node_list') are
+    asked for their latest block by up to 'workers' threads at the same time.
+    A node is healthy if it answered within 'timeout' seconds and is not more
+    than 'max_lag' blocks behind the highest node of the same type. Healthy
+    nodes are ranked by latency so that TRXAPI can always use the fastest
+    one without probing nodes itself. As long as the monitor isn't running,
+    there is no ranking.
+    """
+
+    FULL = "full"
+    SOLIDITY = "solidity"
+
+    PATHS = {
+        FULL: "/wallet/getnowblock",
+        SOLIDITY: "/walletsolidity/getnowblock"
+    }
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, nodes, interval=30, timeout=2, max_lag=5, workers=10):
+        super().__init__(name="NodeMonitor", daemon=True)
+
+        self._nodes = nodes
+        self._interval = interval
+        self._timeout = timeout
+        self._max_lag = max_lag
+        self._workers = workers
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        # Type -> list of (latency, node URL) of healthy nodes
+        self._ranking = {self.FULL: list(), self.SOLIDITY: list()}
+
+        # Node URL -> {"latency", "block", "lag", "healthy"}
+        self._health = dict()
+
+        self.rounds = 0
+
+    @classmethod
+    def shared(cls):
+        """ Return monitor that is shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                nodes = dict()
+
+                for kind, default in [(cls.FULL, "default_full_node"), (cls.SOLIDITY, "default_solidity_node")]:
+                    urls = [cls.cfg.get("tron", default)] + (cls.cfg.get("tron", f"{kind}_node_list") or list())
+                    nodes[kind] = list(dict.fromkeys(url.rstrip("/") for url in urls if url))
+
+                cls._shared = NodeMonitor(
+                    nodes,
+                    interval=cls.cfg.get("node_monitor", "interval") or 30,
+                    timeout=cls.cfg.get("node_monitor", "timeout") or 2,
+                    max_lag=cls.cfg.get("node_monitor", "max_lag") or 5,
+                    workers=cls.cfg.get("node_monitor", "workers") or 10)
+            return cls._shared
+
+    def best(self, kind, exclude=None):
+        """ Return URL of the fastest healthy node of given type
+        (FULL or SOLIDITY) or None if there is no ranking """
+        with self._lock:
+            for _, node in self._ranking[kind]:
+                if node != exclude:
+                    return node
+        return None
+
+    def ranking(self, kind):
+        """ Return URLs of healthy nodes of given type, fastest first """
+        with self._lock:
+            return [node for _, node in self._ranking[kind]]
+
+    def is_healthy(self, node):
+        """ Return TRUE if node was healthy in the last round """
+        with self._lock:
+            health = self._health.get(node.rstrip("/"))
+        return bool(health and health["healthy"])
+
+    def stop(self):
+        """ Stop probing nodes """
+        self._stopped.set()
+
+    def run(self):
+        logging.info("Node monitor started")
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while not self._stopped.is_set():
+                try:
+                    self._probe_all(executor)
+                except Exception as e:
+                    logging.error(f"Node monitor can't probe nodes: {e}")
+
+                self._stopped.wait(self._interval)
+
+        logging.info("Node monitor stopped")
+
+    def stats(self):
+        """ Return number of healthy nodes and fastest node per type """
+        with self._lock:
+            stats = dict()
+
+            for kind, ranking in self._ranking.items():
+                stats[kind] = {
+                    "nodes": len(self._nodes[kind]),
+                    "healthy": len(ranking),
+                    "best": ranking[0][1] if ranking else None,
+                    "latency": round(ranking[0][0], 3) if ranking else None
+                }
+
+            stats["rounds"] = self.rounds
+            return stats
+
+    def _probe_all(self, executor):
+        health = dict()
+
+        for kind, nodes in self._nodes.items():
+            results = list(executor.map(lambda node: self._probe(kind, node), nodes))
+
+            blocks = [block for _, block in results if block is not None]
+            highest = max(blocks) if blocks else None
+
+            ranking = list()
+            for node, (latency, block) in zip(nodes, results):
+                lag = highest - block if block is not None else None
+                healthy = lag is not None and lag <= self._max_lag
+
+                health[node] = {"latency": latency, "block": block, "lag": lag, "healthy": healthy}
+
+                if healthy:
+                    ranking.append((latency, node))
+
+            ranking.sort()
+
+            with self._lock:
+                self._ranking[kind] = ranking
+
+            if not ranking:
+                logging.warning(f"Node monitor: No healthy {kind} node")
+
+        with self._lock:
+            self._health = health
+
+        self.rounds += 1
+
+    def _probe(self, kind, node):
+        """ Return latency and latest block of node or (None, None) """
+        start = time.time()
+
+        try:
+            response = Transport.shared().get(f"{node}{self.PATHS[kind]}", timeout=self._timeout, retry=False)
+            response.raise_for_status()
+            block = response.json()["block_header"]["raw_data"]["number"]
+        except Exception as e:
+            logging.debug(f"Node monitor: {node} not available: {e}")
+            return None, None
+
+        return time.time() - start, block
@@ -0,0 +1,243 @@
+import time
+import queue
+import logging
+import threading
+
+from tronapi.main import Address
+from trxbetbot.trc20 import TRC20
+from trxbetbot.trxapi import TRXAPI
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class PayoutEngine(threading.Thread):
+    """
+    Single thread that sends all payouts from the bot wallet.
+
+    Payouts are taken from a queue in batches of up to 'batch' payouts. The
+    transactions of a batch are created and signed one after another by this
+    thread only, so that sends from the same wallet don't race each other.
+    Signed transactions are then broadcasted by up to 'workers' threads at
+    the same time. Results are returned to the callers through futures.
+    Payouts from other wallets (like the bonus wallet) work the same way if
+    the private key of the wallet is given. Callers get notified about the
+    result by adding a callback to the future instead of waiting for it.
+
+    Signed transactions are kept until they are broadcasted. A payout that is
+    submitted again with the same 'key' (like after a failed or timed out
+    broadcast) broadcasts the same transaction again instead of creating a
+    new one, so it can't be paid twice. A new transaction is only created
+    once the old one expired without being in a block. Transactions with the
+    same ID as a pending one get created again with the next block.
+    """
+
+    # Error of nodes for transactions that are already known
+    DUP_TRANSACTION = "DUP_TRANSACTION_ERROR"
+
+    # Seconds until a payout that got the ID of a pending one is created again
+    BLOCK_TIME = 3
+
+    def __init__(self, privkey, workers=4, batch=10):
+        super().__init__(name="PayoutEngine", daemon=True)
+
+        self._privkey = privkey
+        self._batch = batch
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+
+        # Private key -> wallet
+        self._wallets = dict()
+
+        # Key of payout -> signed transaction
+        self._signed = dict()
+        # IDs of transactions that are not broadcasted yet
+        self._pending = set()
+
+        self._since = time.time()
+        self._latency = 0
+
+        self.submitted = 0
+        self.paid = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, to, amount, privkey=None, key=None) -> Future:
+        """ Queue payout of 'amount' TRX to address 'to' and return future
+        for the broadcast result. Without 'privkey' the bot wallet is used.
+        Payouts with the same 'key' are only created once """
+        return self._submit(self._trx, (to, amount), privkey, key)
+
+    def submit_token(self, ticker, to, amount, privkey=None, key=None) -> Future:
+        """ Queue payout of 'amount' TRC20 tokens with given ticker to
+        address 'to' and return future for the broadcast result """
+        return self._submit(self._token, (ticker, to, amount), privkey, key)
+
+    def _submit(self, build, args, privkey, key):
+        future = Future()
+
+        with self._lock:
+            self.submitted += 1
+
+        self._queue.put((build, args, privkey or self._privkey, key, time.time(), future))
+        return future
+
+    def stop(self):
+        """ Send everything that is queued and end the thread """
+        self._queue.put(None)
+        self.join(timeout=30)
+        self._executor.shutdown(wait=True)
+
+    def run(self):
+        running = True
+
+        while running:
+            batch = [self._queue.get()]
+
+            # Collect everything that is already waiting
+            while len(batch) < self._batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                batch = [item for item in batch if item]
+                running = False
+
+            if batch:
+                self._send(batch)
+
+    def stats(self):
+        """ Return queue size, counters, throughput and failure rate """
+        with self._lock:
+            done = self.paid + self.failed
+            minutes = (time.time() - self._since) / 60
+
+            return {
+                "queued": self._queue.qsize(),
+                "submitted": self.submitted,
+                "paid": self.paid,
+                "failed": self.failed,
+                "batches": self.batches,
+                "per_minute": round(self.paid / minutes, 2) if minutes else 0,
+                "failure_rate": round(self.failed / done * 100) if done else 0,
+                "latency": round(self._latency / done, 2) if done else 0
+            }
+
+    def _send(self, batch):
+        self.batches += 1
+
+        for item in batch:
+            build, args, privkey, key, queued, future = item
+
+            try:
+                wallet = self._wallet(privkey)
+
+                with self._lock:
+                    signed = self._signed.get(key) if key else None
+
+                # Transaction of an earlier try can't be in a block anymore
+                if signed and self._expired(signed):
+                    if self._in_block(wallet, signed):
+                        logging.info(f"Payout {signed['txID']} was already sent")
+                        self._done(future, queued, key, signed, result={"result": True, "transaction": signed})
+                        continue
+
+                    with self._lock:
+                        self._pending.discard(signed["txID"])
+                        del self._signed[key]
+
+                    signed = None
+
+                if not signed:
+                    signed = wallet.trx.sign(build(wallet, *args))
+
+                    with self._lock:
+                        # Same ID as a pending transaction. Would be rejected
+                        if signed["txID"] in self._pending:
+                            duplicate = True
+                        else:
+                            duplicate = False
+                            self._pending.add(signed["txID"])
+
+                            if key:
+                                self._signed[key] = signed
+
+                    if duplicate:
+                        logging.info(f"Payout {args} got ID of pending payout {signed['txID']}. Creating it again")
+                        threading.Timer(self.BLOCK_TIME, self._queue.put, [item]).start()
+                        continue
+            except Exception as e:
+                logging.error(f"Payout {args} can't be created: {e}")
+                self._done(future, queued, error=e)
+                continue
+
+            self._executor.submit(self._broadcast, wallet, signed, key, queued, future)
+
+    def _broadcast(self, wallet, signed, key, queued, future):
+        try:
+            result = wallet.trx.broadcast(signed)
+
+            # Node already knows the transaction from an earlier try
+            if result.get("code") == self.DUP_TRANSACTION:
+                result = {"result": True, "transaction": signed}
+
+            # An error was returned
+            if "code" in result and "message" in result:
+                raise Exception(result["message"])
+        except Exception as e:
+            logging.error(f"Payout {signed['txID']} can't be broadcasted: {e}")
+            self._done(future, queued, key, signed, error=e)
+            return
+
+        self._done(future, queued, key, signed, result=result)
+
+    def _done(self, future, queued, key=None, signed=None, result=None, error=None):
+        with self._lock:
+            if error:
+                self.failed += 1
+            else:
+                self.paid += 1
+
+            self._latency += time.time() - queued
+
+            # Transaction doesn't need to be broadcasted again. Failed ones
+            # are kept so that the same transaction is used with the next try
+            if signed and not (error and key):
+                self._pending.discard(signed["txID"])
+
+                if key and self._signed.get(key) is signed:
+                    del self._signed[key]
+
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _expired(self, signed):
+        """ Return TRUE if transaction can't be added to a block anymore """
+        return signed["raw_data"]["expiration"] < time.time() * 1000
+
+    def _in_block(self, wallet, signed):
+        try:
+            wallet.re(wallet.trx.get_transaction, signed["txID"])
+            return True
+        except ValueError:
+            # Transaction not found
+            return False
+
+    def _trx(self, wallet, to, amount):
+        return wallet.re(
+            wallet.transaction_builder.send_transaction,
+            to,
+            amount,
+            wallet.default_address.hex)
+
+    def _token(self, wallet, ticker, to, amount):
+        return TRC20().transaction(ticker, wallet, to, amount)
+
+    def _wallet(self, privkey):
+        if privkey not in self._wallets:
+            address = Address.from_private_key(privkey)["base58"]
+            self._wallets[privkey] = TRXAPI(private_key=privkey, default_address=address)
+        return self._wallets[privkey]
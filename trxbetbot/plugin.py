@@ -1,5 +1,4 @@
 import os
-import sqlite3
 import logging
 import inspect
 import threading
@@ -7,6 +6,17 @@ import trxbetbot.constants as c
 import trxbetbot.emoji as emo
 
 from trxbetbot.trxapi import TRXAPI
+from trxbetbot.migration import Migrator
+from trxbetbot.analytics import Analytics
+from trxbetbot.addresspool import AddressPool
+from trxbetbot.blockcache import BlockCache
+from trxbetbot.blockwatcher import BlockWatcher
+from trxbetbot.confirmation import ConfirmationResolver
+from trxbetbot.payout import PayoutEngine
+from trxbetbot.registry import BetRegistry
+from trxbetbot.sweeper import Sweeper
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
 from pathlib import Path
 from telegram import ChatAction, Chat
 from trxbetbot.config import ConfigManager
@@ -91,7 +101,7 @@ class TrxBetBotPlugin:
     # TODO: Maybe better set unique identifier as name?
     def repeat_job(self, callback, interval, first=0, context=None, name=None):
         """ Logic that gets executed periodically """
-        self._tgb.job_queue.run_repeating(
+        return self._tgb.job_queue.run_repeating(
             callback,
             interval,
             first=first,
@@ -101,7 +111,7 @@ class TrxBetBotPlugin:
     # TODO: Maybe better set unique identifier as name?
     def run_job(self, callback, when, context=None, name=None):
         """ Logic that gets executed once """
-        self._tgb.job_queue.run_once(
+        return self._tgb.job_queue.run_once(
             callback,
             when,
             context=context,
@@ -121,6 +131,46 @@ class TrxBetBotPlugin:
     def get_tron(self) -> TRXAPI:
         return self._tgb.tron
 
+    def get_db(self) -> ConnectionManager:
+        """ Return the manager for pooled database connections """
+        return self._tgb.db
+
+    def get_address_pool(self) -> AddressPool:
+        """ Return the pool of pre-generated betting addresses """
+        return self._tgb.addresses
+
+    def get_analytics(self) -> Analytics:
+        """ Return read-only access to the databases of all games """
+        return self._tgb.analytics
+
+    def get_block_cache(self) -> BlockCache:
+        """ Return the cache for block IDs and transaction infos """
+        return self._tgb.blocks
+
+    def get_block_watcher(self) -> BlockWatcher:
+        """ Return the watcher for transfers in new blocks """
+        return self._tgb.watcher
+
+    def get_confirmations(self) -> ConfirmationResolver:
+        """ Return the resolver for transaction infos of pending bets """
+        return self._tgb.confirmations
+
+    def get_payouts(self) -> PayoutEngine:
+        """ Return the engine that sends all payouts """
+        return self._tgb.payouts
+
+    def get_registry(self) -> BetRegistry:
+        """ Return the registry of all pending bets """
+        return self._tgb.registry
+
+    def get_sweeper(self) -> Sweeper:
+        """ Return the sweeper for funds of finished bets """
+        return self._tgb.sweeper
+
+    def get_resource_cache(self) -> ResourceCache:
+        """ Return the cache for resource files """
+        return self._tgb.resources
+
     def get_global_resource(self, filename):
         """ Return the content of the given file
         from the global 'resource' directory """
@@ -128,8 +178,7 @@ class TrxBetBotPlugin:
         path = os.path.join(os.getcwd(), c.DIR_RES, filename)
 
         try:
-            with open(path, "r", encoding="utf8") as f:
-                return f.read()
+            return self.get_resource_cache().read(path)
         except Exception as e:
             logging.error(e)
             self.notify(e)
@@ -142,8 +191,7 @@ class TrxBetBotPlugin:
         path = os.path.join(self.get_res_path(plugin), filename)
 
         try:
-            with open(path, "r", encoding="utf8") as f:
-                return f.read()
+            return self.get_resource_cache().read(path)
         except Exception as e:
             logging.error(e)
             self.notify(e)
@@ -161,10 +209,7 @@ class TrxBetBotPlugin:
             res["success"] = False
             return res
 
-        timeout = self.global_config.get("database", "timeout")
-        db_timeout = timeout if timeout else 5
-
-        db_path = os.path.join(os.getcwd(), c.DIR_DAT, c.FILE_DAT)
+        db_path = self.get_global_db_path()
 
         try:
             # Create directory if it doesn't exist
@@ -176,31 +221,41 @@ class TrxBetBotPlugin:
             logging.error(e)
             self.notify(e)
 
-        con = None
-        cur = None
-
         try:
-            con = sqlite3.connect(db_path, timeout=db_timeout)
-            cur = con.cursor()
-            cur.execute(sql, args)
-            con.commit()
-
-            res["data"] = cur.fetchall()
+            res["data"] = self.get_db().execute(db_path, sql, *args)
             res["success"] = True
         except Exception as e:
             res["data"] = str(e)
             res["success"] = False
             logging.error(e)
             self.notify(e)
-        finally:
-            if cur:
-                cur.close()
-            if con:
-                con.close()
 
-            return res
+        return res
 
     # TODO: Describe how arguments can be used
+    def execute_analytics_sql(self, sql, *args):
+        """ Execute read-only SQL statement on the global database with
+        all game databases attached and return the result if there is one """
+
+        res = {"success": None, "data": None}
+
+        # Check if database usage is enabled
+        if not self.global_config.get("database", "use_db"):
+            res["data"] = "Database disabled"
+            res["success"] = False
+            return res
+
+        try:
+            res["data"] = self.get_analytics().execute(sql, *args)
+            res["success"] = True
+        except Exception as e:
+            res["data"] = str(e)
+            res["success"] = False
+            logging.error(e)
+            self.notify(e)
+
+        return res
+
     def execute_sql(self, sql, *args, plugin="", db_name=""):
         """ Execute raw SQL statement on database for given
         plugin and return the result if there is one """
@@ -213,24 +268,7 @@ class TrxBetBotPlugin:
             res["success"] = False
             return res
 
-        timeout = self.global_config.get("database", "timeout")
-        db_timeout = timeout if timeout else 5
-
-        if db_name:
-            if not db_name.lower().endswith(".db"):
-                db_name += ".db"
-        else:
-            if plugin:
-                db_name = plugin + ".db"
-            else:
-                db_name = self.get_name() + ".db"
-
-        if plugin:
-            plugin = plugin.lower()
-            data_path = self.get_dat_path(plugin=plugin)
-            db_path = os.path.join(data_path, db_name)
-        else:
-            db_path = os.path.join(self.get_dat_path(), db_name)
+        db_path = self.get_db_path(plugin=plugin, db_name=db_name)
 
         try:
             # Create directory if it doesn't exist
@@ -242,87 +280,97 @@ class TrxBetBotPlugin:
             logging.error(e)
             self.notify(e)
 
-        con = None
-        cur = None
-
         try:
-            con = sqlite3.connect(db_path, timeout=db_timeout)
-            cur = con.cursor()
-            cur.execute(sql, args)
-            con.commit()
-
-            res["data"] = cur.fetchall()
+            res["data"] = self.get_db().execute(db_path, sql, *args)
             res["success"] = True
         except Exception as e:
             res["data"] = str(e)
             res["success"] = False
             logging.error(e)
             self.notify(e)
-        finally:
-            if cur:
-                cur.close()
-            if con:
-                con.close()
 
-            return res
+        return res
 
-    def global_table_exists(self, table_name):
-        """ Return TRUE if given table exists in global database, otherwise FALSE """
-        db_path = os.path.join(os.getcwd(), c.DIR_DAT, c.FILE_DAT)
+    def iter_sql(self, sql, *args, plugin="", db_name="", page_size=None):
+        """ Execute raw SQL statement on database for given plugin and return
+        a generator that yields the result in lists of 'page_size' rows """
 
-        if not Path(db_path).is_file():
-            return False
+        # Check if database usage is enabled
+        if not self.global_config.get("database", "use_db"):
+            return
 
-        con = sqlite3.connect(db_path)
-        cur = con.cursor()
-        exists = False
+        if not page_size:
+            page_size = self.global_config.get("database", "page_size")
 
-        statement = self.get_global_resource("table_exists.sql")
+        db_path = self.get_db_path(plugin=plugin, db_name=db_name)
 
         try:
-            if cur.execute(statement, [table_name]).fetchone():
-                exists = True
+            yield from self.get_db().iterate(db_path, sql, *args, page_size=page_size or 100)
         except Exception as e:
             logging.error(e)
             self.notify(e)
+            raise e
 
-        con.close()
-        return exists
+    def page_sql(self, table, key_column, after=None, limit=None, plugin="", db_name=""):
+        """ Return one page of rows from given table of the plugin database as
+        tuple (rows, next key). Use the next key as 'after' to get the next page """
+        if not limit:
+            limit = self.global_config.get("database", "page_size")
 
-    def table_exists(self, table_name, plugin="", db_name=""):
-        """ Return TRUE if given table exists, otherwise FALSE """
-        if db_name:
-            if not db_name.lower().endswith(".db"):
-                db_name += ".db"
-        else:
-            if plugin:
-                db_name = plugin + ".db"
-            else:
-                db_name = self.get_name() + ".db"
+        db_path = self.get_db_path(plugin=plugin, db_name=db_name)
+        return self.get_db().page(db_path, table, key_column, after=after, limit=limit or 100)
 
-        if plugin:
-            db_path = os.path.join(self.get_dat_path(plugin=plugin), db_name)
-        else:
-            db_path = os.path.join(self.get_dat_path(), db_name)
+    def migrate(self):
+        """ Apply new migrations of this plugin. Migrations in 'resources/migrations'
+        are for the plugin database, the ones in 'resources/migrations/global' for the
+        global database. Gets executed every time the plugin is loaded """
+
+        # Check if database usage is enabled
+        if not self.global_config.get("database", "use_db"):
+            return
+
+        migrator = Migrator(self.get_db(), self.get_resource_cache())
+        migrations = os.path.join(self.get_res_path(), c.DIR_MIG)
+
+        if os.path.isdir(migrations):
+            db_path = self.get_db_path()
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            migrator.migrate(db_path, self.get_name(), migrations)
+
+        global_migrations = os.path.join(migrations, c.DIR_GLB)
+
+        if os.path.isdir(global_migrations):
+            db_path = self.get_global_db_path()
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            migrator.migrate(db_path, self.get_name(), global_migrations)
+
+    def global_table_exists(self, table_name):
+        """ Return TRUE if given table exists in global database, otherwise FALSE """
+        db_path = self.get_global_db_path()
 
         if not Path(db_path).is_file():
             return False
 
-        con = sqlite3.connect(db_path)
-        cur = con.cursor()
-        exists = False
+        try:
+            return table_name in self.get_db().tables(db_path)
+        except Exception as e:
+            logging.error(e)
+            self.notify(e)
+            return False
+
+    def table_exists(self, table_name, plugin="", db_name=""):
+        """ Return TRUE if given table exists, otherwise FALSE """
+        db_path = self.get_db_path(plugin=plugin, db_name=db_name)
 
-        statement = self.get_global_resource("table_exists.sql")
+        if not Path(db_path).is_file():
+            return False
 
         try:
-            if cur.execute(statement, [table_name]).fetchone():
-                exists = True
+            return table_name in self.get_db().tables(db_path)
         except Exception as e:
             logging.error(e)
             self.notify(e)
-
-        con.close()
-        return exists
+            return False
 
     def get_name(self):
         """ Return the name of the current plugin """
@@ -346,6 +394,23 @@ class TrxBetBotPlugin:
             plugin = self.get_name()
         return os.path.join(c.DIR_SRC, c.DIR_PLG, plugin, c.DIR_DAT)
 
+    def get_db_path(self, plugin="", db_name=""):
+        """ Return path of database file for this plugin """
+        if db_name:
+            if not db_name.lower().endswith(".db"):
+                db_name += ".db"
+        else:
+            if plugin:
+                db_name = plugin.lower() + ".db"
+            else:
+                db_name = self.get_name() + ".db"
+
+        return os.path.join(self.get_dat_path(plugin=plugin.lower()), db_name)
+
+    def get_global_db_path(self):
+        """ Return path of global database file """
+        return os.path.join(os.getcwd(), c.DIR_DAT, c.FILE_DAT)
+
     def get_plg_path(self, plugin=""):
         """ Return path of current plugin directory """
         if not plugin:
@@ -1,7 +1,9 @@
 import os
+import time
 import logging
 import trxbetbot.utils as utl
 import trxbetbot.emoji as emo
+import trxbetbot.constants as con
 
 from telegram import ParseMode
 from trxbetbot.config import ConfigManager
@@ -10,6 +12,9 @@ from trxbetbot.plugin import TrxBetBotPlugin
 
 class Admin(TrxBetBotPlugin):
 
+    # Max number of messages for one result of a SQL query
+    MAX_SQL_MSGS = 10
+
     @TrxBetBotPlugin.owner
     @TrxBetBotPlugin.private
     @TrxBetBotPlugin.threaded
@@ -33,17 +38,46 @@ class Admin(TrxBetBotPlugin):
             args.pop(0)
 
             sql = " ".join(args)
-            res = self.execute_sql(sql, plugin=plugin, db_name=db)
 
-            if res["success"]:
-                if res["data"]:
-                    msg = '\n'.join(str(s) for s in res["data"])
+            if self.get_db().is_write(sql):
+                res = self.execute_sql(sql, plugin=plugin, db_name=db)
+
+                if res["success"]:
+                    if res["data"]:
+                        msg = '\n'.join(str(s) for s in res["data"])
+                    else:
+                        msg = f"{emo.INFO} No data returned"
                 else:
-                    msg = f"{emo.INFO} No data returned"
-            else:
-                msg = f"{emo.ERROR} {res['data']}"
+                    msg = f"{emo.ERROR} {res['data']}"
+
+                update.message.reply_text(msg)
+                return
+
+            # Send result page by page instead of loading all rows at once
+            msg = str()
+            sent = 0
+
+            try:
+                for rows in self.iter_sql(sql, plugin=plugin, db_name=db):
+                    msg += '\n'.join(str(r) for r in rows) + '\n'
+
+                    while len(msg) > con.MAX_TG_MSG_LEN:
+                        chunk = utl.split_msg(msg, only_one=True)[0]
+                        update.message.reply_text(chunk)
+                        msg = msg[len(chunk):].lstrip('\n')
+                        sent += 1
+
+                        if sent >= self.MAX_SQL_MSGS:
+                            update.message.reply_text(f"{emo.INFO} Result truncated")
+                            return
+            except Exception as e:
+                update.message.reply_text(f"{emo.ERROR} {e}")
+                return
 
-            update.message.reply_text(msg)
+            if msg.strip():
+                update.message.reply_text(msg)
+            elif not sent:
+                update.message.reply_text(f"{emo.INFO} No data returned")
 
         # ---- Change configuration ----
         elif command == "cfg":
@@ -111,6 +145,42 @@ class Admin(TrxBetBotPlugin):
                     text=f"Usage:\n{self.get_usage()}",
                     parse_mode=ParseMode.MARKDOWN)
 
+        # ---- Reload pending bet from database ----
+        elif command == "resync":
+            address = args[0]
+
+            for plg in self.get_plugins():
+                if plg.get_name() == plugin and hasattr(plg, "resync"):
+                    if plg.resync(address):
+                        msg = f"{emo.DONE} Bet will be reloaded on next check"
+                    else:
+                        msg = f"{emo.ERROR} No pending bet found for `{address}`"
+                    break
+            else:
+                msg = f"{emo.ERROR} Plugin `{plugin}` doesn't support resync"
+
+            update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
+
+        # ---- List pending bets ----
+        elif command == "bets":
+            registry = self.get_registry()
+            games = list(registry.stats()) if plugin == "-" else [plugin]
+
+            msg = str()
+            now = time.time()
+
+            for game in games:
+                for pending in registry.by_game(game):
+                    job = "job" if pending.job else "no job"
+                    msg += f"`{pending.address}` {game} {pending.usr_id} " \
+                           f"{pending.choice} {int(pending.deadline - now)}s {job}\n"
+
+            if not msg:
+                msg = f"{emo.INFO} No pending bets"
+
+            for part in utl.split_msg(msg):
+                update.message.reply_text(part, parse_mode=ParseMode.MARKDOWN)
+
         # ---- Manage plugins ----
         elif command == "plg":
             try:
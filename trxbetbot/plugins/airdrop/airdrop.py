@@ -51,54 +51,18 @@ class Airdrop(TrxBetBotPlugin):
         min_trx = self.config.get("min_trx")
         min_sun = self.get_tron().toSun(min_trx)
 
-        # Select more data sets than we need to make sure that after
-        # filtering out same users we still have the needed amount of data
-        bet_count = nr_users * 50
+        # Last users that placed a bet in any game, without own user
+        sql = self.get_resource("select_last_users.sql")
+        res_usr = self.execute_analytics_sql(sql, min_sun, str(update.effective_user.id), nr_users)
 
-        sql = self.get_resource("select_last.sql")
-        res_bet = self.execute_sql(sql, min_sun, bet_count, plugin="bet")
-
-        if not res_bet["success"]:
-            msg = f"{emo.ERROR} Couldn't retrieve last active users from /bet"
+        if not res_usr["success"]:
+            msg = f"{emo.ERROR} Couldn't retrieve last active users"
             update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
-            logging.error(f"{msg} - {res_bet}")
+            logging.error(f"{msg} - {res_usr}")
             self.notify(msg)
             return
 
-        res_win = self.execute_sql(sql, min_sun, bet_count, plugin="win")
-
-        if not res_win["success"]:
-            msg = f"{emo.ERROR} Couldn't retrieve last active users from /win"
-            update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
-            logging.error(f"{msg} - {res_win}")
-            self.notify(msg)
-            return
-
-        res_mix = self.execute_sql(sql, min_sun, bet_count, plugin="mix")
-
-        if not res_mix["success"]:
-            msg = f"{emo.ERROR} Couldn't retrieve last active users from /mix"
-            update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
-            logging.error(f"{msg} - {res_mix}")
-            self.notify(msg)
-            return
-
-        # Combine all lists and sort bets by date
-        final = res_bet["data"] + res_win["data"] + res_mix["data"]
-        final.sort(key=lambda x: x[11])
-
-        logging.info(f"Sorted last bets: {final}")
-
-        # Get last user IDs
-        user_ids = set()
-        for bet in reversed(final):
-            # Do not tip own user
-            if int(update.effective_user.id) == int(bet[2]):
-                continue
-            user_ids.add(bet[2])
-
-            if len(user_ids) == nr_users:
-                break
+        user_ids = [row[0] for row in res_usr["data"]]
 
         logging.info(f"User IDs to tip: {user_ids}")
 
@@ -122,7 +86,7 @@ class Airdrop(TrxBetBotPlugin):
         if usr_amount <= self.MIN_AMOUNT:
             msg = f"{emo.ERROR} Not possible to tip less than {self.MIN_AMOUNT} TRX"
             update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
-            logging.error(f"{msg} - {res_mix}")
+            logging.error(msg)
             return
 
         sql = self.get_resource("select_user.sql")
@@ -148,7 +112,7 @@ class Airdrop(TrxBetBotPlugin):
         if available_amount < float(initial_amount):
             msg = f"{emo.ERROR} Not enough balance. You need {total} TRX for this airdrop."
             update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
-            logging.error(f"{msg} - {res_mix}")
+            logging.error(msg)
             return
 
         # Send message to user that airdrop will take some time
@@ -1,5 +0,0 @@
-SELECT * FROM (
-SELECT * FROM bets
-WHERE usr_amount >= ?
-ORDER BY rowid DESC LIMIT ?)
-ORDER BY rowid ASC;
\ No newline at end of file
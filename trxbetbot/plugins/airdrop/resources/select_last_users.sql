@@ -0,0 +1,6 @@
+SELECT usr_id
+FROM all_bets
+WHERE usr_amount >= ? AND usr_id != ?
+GROUP BY usr_id
+ORDER BY MAX(date_time) DESC
+LIMIT ?
\ No newline at end of file
@@ -0,0 +1 @@
+ALTER TABLE bets ADD COLUMN sweep_attempts INTEGER;
\ No newline at end of file
@@ -1,3 +1,3 @@
-SELECT *
+SELECT bet_address, bet_chars, usr_id, usr_address, usr_amount, bet_trx_id, bet_trx_block, bet_trx_block_hash, bet_won, pay_amount, pay_trx_id, date_time, rtn_trx_id, sc_trx, pay_pending
 FROM bets
 WHERE bet_address = ?
\ No newline at end of file
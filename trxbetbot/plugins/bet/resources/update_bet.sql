@@ -1,3 +1,3 @@
 UPDATE bets
-SET usr_address = ?, usr_amount = ?, bet_trx_id = ?, bet_trx_block = ?, bet_trx_block_hash = ?, bet_won = ?, pay_amount = ?, pay_trx_id = ?
+SET usr_address = ?, usr_amount = ?, bet_trx_id = ?, bet_trx_block = ?, bet_trx_block_hash = ?, bet_won = ?, pay_amount = ?, pay_trx_id = ?, sc_trx = ?, pay_pending = ?
 WHERE bet_address = ?
\ No newline at end of file
@@ -1,3 +1,4 @@
+import os
 import re
 import sys
 import psutil
@@ -6,10 +7,17 @@ import urllib.request
 import trxbetbot.emoji as emo
 
 from trxbetbot.plugin import TrxBetBotPlugin
+from trxbetbot.hedging import Hedging
+from trxbetbot.transport import Transport
+from trxbetbot.breaker import CircuitBreakers
+from trxbetbot.ratelimit import RateLimiter
+from trxbetbot.nodemonitor import NodeMonitor
 
 
 class Debug(TrxBetBotPlugin):
 
+    DATABASES = ["bet", "mix", "win", "autobet"]
+
     @TrxBetBotPlugin.owner
     @TrxBetBotPlugin.private
     @TrxBetBotPlugin.threaded
@@ -22,10 +30,177 @@ class Debug(TrxBetBotPlugin):
 
         msg = f"{emo.INFO} Open files: {len(open_files)}\n" \
               f"{emo.INFO} Python: {v}\n" \
-              f"{emo.INFO} IP: {self.get_external_ip()}"
+              f"{emo.INFO} IP: {self.get_external_ip()}\n" \
+              f"{self.get_resource_stats()}\n" \
+              f"{self.get_registry_stats()}\n" \
+              f"{self.get_watcher_stats()}\n" \
+              f"{self.get_block_cache_stats()}\n" \
+              f"{self.get_confirmation_stats()}\n" \
+              f"{self.get_address_pool_stats()}\n" \
+              f"{self.get_payout_stats()}\n" \
+              f"{self.get_sweeper_stats()}\n" \
+              f"{self.get_http_stats()}\n" \
+              f"{self.get_node_stats()}\n" \
+              f"{self.get_breaker_stats()}\n" \
+              f"{self.get_hedging_stats()}\n" \
+              f"{self.get_rate_limit_stats()}\n" \
+              f"{self.get_db_stats()}\n" \
+              f"{self.get_db_profiles()}"
         update.message.reply_text(msg)
         logging.info(msg.replace("\n", " - "))
 
+    def get_resource_stats(self):
+        """ Return usage of the resource cache """
+        stats = self.get_resource_cache().stats()
+        return f"{emo.INFO} Resources: {stats['cached']} cached - " \
+               f"{stats['hits']} hits - {stats['misses']} misses"
+
+    def get_registry_stats(self):
+        """ Return number of pending bets per game """
+        games = " ".join(f"{k}={v}" for k, v in self.get_registry().stats().items())
+        return f"{emo.INFO} Pending bets: {games if games else 0}"
+
+    def get_watcher_stats(self):
+        """ Return state of the block watcher """
+        watcher = self.get_block_watcher()
+
+        if not watcher.is_alive():
+            return f"{emo.INFO} Block watcher: not running"
+
+        stats = watcher.stats()
+        return f"{emo.INFO} Block watcher: block {stats['block']} - " \
+               f"{stats['watched']} watched - {stats['blocks']} blocks - " \
+               f"{stats['matches']} matches - {stats['errors']} errors"
+
+    def get_block_cache_stats(self):
+        """ Return usage of the cache for blocks and transaction infos """
+        stats = self.get_block_cache().stats()
+
+        msg = str()
+        for name, values in stats.items():
+            msg += f"{emo.INFO} Cache {name}: {values['cached']} cached - " \
+                   f"{values['hits']} hits - {values['misses']} misses - {values['rate']}% hit rate\n"
+
+        return msg.strip()
+
+    def get_confirmation_stats(self):
+        """ Return usage of the resolver for transaction infos """
+        stats = self.get_confirmations().stats()
+        return f"{emo.INFO} Confirmations: {stats['pending']} pending - " \
+               f"{stats['blocks']} blocks - {stats['resolved']} resolved - {stats['single']} single"
+
+    def get_address_pool_stats(self):
+        """ Return depth and usage of the pool of betting addresses """
+        stats = self.get_address_pool().stats()
+        return f"{emo.INFO} Address pool: {stats['depth']} left - " \
+               f"{stats['popped']} popped - {stats['misses']} misses - " \
+               f"{stats['refills']} refills - {stats['latency']}s last refill"
+
+    def get_payout_stats(self):
+        """ Return throughput and failures of the payout engine """
+        stats = self.get_payouts().stats()
+        return f"{emo.INFO} Payouts: {stats['queued']} queued - " \
+               f"{stats['paid']} paid - {stats['failed']} failed ({stats['failure_rate']}%) - " \
+               f"{stats['per_minute']} per minute - {stats['latency']}s latency - {stats['batches']} batches"
+
+    def get_sweeper_stats(self):
+        """ Return state of the sweeper """
+        sweeper = self.get_sweeper()
+
+        if not sweeper.is_alive():
+            return f"{emo.INFO} Sweeper: not running"
+
+        stats = sweeper.stats()
+        return f"{emo.INFO} Sweeper: {stats['rounds']} rounds - {stats['swept']} swept - " \
+               f"{stats['empty']} empty - {stats['errors']} errors - {stats['given_up']} given up - " \
+               f"{self.get_tron().fromSun(stats['amount'])} TRX - " \
+               f"{self.get_tron().fromSun(stats['returned'])} TRX returned"
+
+    def get_http_stats(self):
+        """ Return usage of pooled HTTP connections per host """
+        stats = Transport.shared().stats()
+
+        msg = str()
+        for host, values in stats.items():
+            msg += f"{emo.INFO} HTTP {host}: {values['requests']} requests - " \
+                   f"{values['connections']} connections - {values['errors']} errors - " \
+                   f"{values['latency']}s latency\n"
+
+        return msg.strip() if msg else f"{emo.INFO} HTTP: no requests"
+
+    def get_node_stats(self):
+        """ Return healthy and fastest nodes of the node monitor """
+        monitor = NodeMonitor.shared()
+
+        if not monitor.is_alive():
+            return f"{emo.INFO} Node monitor: not running"
+
+        stats = monitor.stats()
+
+        msg = str()
+        for kind in [NodeMonitor.FULL, NodeMonitor.SOLIDITY]:
+            msg += f"{emo.INFO} {kind.capitalize()} nodes: {stats[kind]['healthy']} of " \
+                   f"{stats[kind]['nodes']} healthy - fastest {stats[kind]['best']} " \
+                   f"({stats[kind]['latency']}s)\n"
+
+        return msg.strip()
+
+    def get_breaker_stats(self):
+        """ Return nodes that requests are stopped to """
+        stats = CircuitBreakers.shared().stats()
+        nodes = ", ".join(stats["open"]) or "none"
+
+        return f"{emo.INFO} Stopped nodes: {nodes} - " \
+               f"{stats['opened']} times stopped - {stats['rejected']} requests rejected"
+
+    def get_hedging_stats(self):
+        """ Return number of reads that were also sent to a second node """
+        stats = Hedging.shared().stats()
+        return f"{emo.INFO} Hedged reads: {stats['hedged']} of {stats['calls']} - " \
+               f"{stats['won']} won - {stats['bypassed']} not hedged (pool busy) - delay {stats['delay']}s"
+
+    def get_rate_limit_stats(self):
+        """ Return available tokens per API host and key """
+        stats = RateLimiter.shared().stats()
+
+        msg = str()
+        for host, tokens in stats["hosts"].items():
+            levels = ", ".join(f"{key}: {level}" for key, level in tokens.items())
+            msg += f"{emo.INFO} Rate limit {host}: {levels}\n"
+
+        msg += f"{emo.INFO} Rate limit: {stats['waited']} waited - {stats['rejected']} rejected"
+        return msg
+
+    def get_db_stats(self):
+        """ Return usage of pooled database connections and writer threads """
+        stats = self.get_db().stats()
+        return f"{emo.INFO} DB connections: {stats['open']} open - " \
+               f"{stats['opened']} opened - {stats['reused']} reused\n" \
+               f"{emo.INFO} DB writer: {stats['written']} statements - " \
+               f"{stats['transactions']} transactions"
+
+    def get_db_profiles(self):
+        """ Return effective database settings for global and game databases """
+        db_paths = {"global": self.get_global_db_path()}
+
+        for plugin in self.DATABASES:
+            db_paths[plugin] = self.get_db_path(plugin=plugin)
+
+        msg = str()
+        for name, db_path in db_paths.items():
+            if not os.path.isfile(db_path):
+                continue
+
+            try:
+                profile = self.get_db().profile(db_path)
+                values = " ".join(f"{k}={v}" for k, v in profile.items())
+                msg += f"{emo.INFO} DB {name}: {values}\n"
+            except Exception as e:
+                logging.error(f"Can't read database profile for {name}: {e}")
+                msg += f"{emo.ERROR} DB {name}: {e}\n"
+
+        return msg.strip()
+
     def get_external_ip(self):
         site = urllib.request.urlopen("http://checkip.dyndns.org/").read()
         grab = re.findall(r"[0-9]+(?:\.[0-9]+){3}", site.decode("utf-8"))
@@ -2,16 +2,20 @@ import os
 import time
 import random
 import logging
+import threading
 import trxbetbot.emoji as emo
 import trxbetbot.constants as con
 
-from tronapi import Tron
 from tronapi.main import Address
-from trxbetbot.trc20 import TRC20
 from telegram import ParseMode, Chat
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from trxbetbot.plugin import TrxBetBotPlugin
+from trxbetbot.trxapi import TRXAPI
 from trxbetbot.tronscan import Tronscan
+from trxbetbot.ratelimit import RateLimiter
+from trxbetbot.refund import Refund
+from trxbetbot.registry import PendingBet
+from trxbetbot.polling import PollingSchedule
 from ..automix.automix import Automix
 
 
@@ -21,8 +25,10 @@ class Mix(TrxBetBotPlugin):
     _LOST_DIR = "lost"
     _VALID_CHARS = "123456789abcdef"
     _SECOND_CHANCE_DIR = "won_second"
+    _RETURN_ATTEMPTS = 3
 
-    tronscan = Tronscan()
+    # Balance checks are repeated anyway, so don't wait for the rate limit
+    tronscan = Tronscan(priority=RateLimiter.LOW)
 
     def __enter__(self):
         if not self.table_exists("addresses"):
@@ -34,6 +40,11 @@ class Mix(TrxBetBotPlugin):
 
         return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Pending bets need the current schema, so they are loaded after the migrations
+        if exc_type is None:
+            self.load_pending()
+
     @TrxBetBotPlugin.threaded
     @TrxBetBotPlugin.send_typing
     def execute(self, bot, update, args):
@@ -93,36 +104,35 @@ class Mix(TrxBetBotPlugin):
             self.notify(msg)
             return
 
-        # Generate new betting address
-        tron = Tron()
-        account = tron.create_account
-        tron.private_key = account.private_key
-        tron.default_address = account.address.base58
-
-        addr = account.address.base58
-
-        # Check if generated address is valid
-        if not bool(tron.isAddress(account.address.hex)):
+        # Take pre-generated betting address from pool
+        try:
+            addr, privkey = self.get_address_pool().pop()
+        except Exception as e:
             msg = f"{emo.ERROR} Generated wallet is not valid"
             update.message.reply_text(msg)
+            logging.error(f"{msg}: {e}")
             return
 
-        generated = {"pubkey": account.public_key,
-                     "privkey": account.private_key,
-                     "addr_hex": account.address.hex,
-                     "addr_base58": account.address.base58}
+        tron = TRXAPI(private_key=privkey, default_address=addr)
+
+        generated = {"privkey": privkey,
+                     "addr_hex": tron.default_address.hex,
+                     "addr_base58": addr}
 
         logging.info(f"{addr} TRX address created {generated} - {update}")
 
         # Save generated address to database
         sql = self.get_resource("insert_address.sql")
-        self.execute_sql(sql, account.address.base58, account.private_key)
+        self.execute_sql(sql, addr, privkey)
 
         leverage = preset["leverage"]
 
         # Save bet details to database
         sql = self.get_resource("insert_bet.sql")
-        self.execute_sql(sql, account.address.base58, choice, update.effective_user.id)
+        self.execute_sql(sql, addr, choice, update.effective_user.id)
+
+        # Bet data will be kept for the whole lifetime of the job
+        bet = DBBet(self, addr, choice, update.effective_user.id)
 
         # Get min and max amounts for this bet from config
         min_trx = preset["min_trx"]
@@ -156,12 +166,10 @@ class Mix(TrxBetBotPlugin):
             logging.info(f"{addr} Wallet for auto-send: {res['data']}")
 
             # Users existing wallet used for auto-send
-            from_user = Tron()
-            from_user.private_key = res["data"][0][2]
-            from_user.default_address = res["data"][0][1]
+            from_user = TRXAPI(private_key=res["data"][0][2], default_address=res["data"][0][1])
 
             # Get balance (in "Sun") of users wallet address
-            balance = from_user.trx.get_balance()
+            balance = from_user.re(from_user.trx.get_balance)
             trx_balance = from_user.fromSun(balance)
 
             logging.info(f"{addr} TRX Balance - Current: {trx_balance} - Needed: {amount + con.TRX_FEE}")
@@ -202,6 +210,17 @@ class Mix(TrxBetBotPlugin):
                             msg = f"{emo.DONE} Successfully sent `{amount}` TRX to `{addr}`"
 
                         logging.info(f"{addr} {msg} - {send}")
+
+                        # Transaction is already known and doesn't need to be searched for
+                        value = send["transaction"]["raw_data"]["contract"][0]["parameter"]["value"]
+
+                        bet.bet_trx_id = send["transaction"]["txID"]
+                        bet.usr_address = from_user.default_address.base58
+                        bet.usr_amount = value.get("amount", from_user.toSun(amount))
+
+                        if not bet.flush():
+                            logging.error(f"{addr} Can't save auto-send transaction {bet.bet_trx_id}")
+
                         betting_msg = betting_msg.replace("{{state}}", msg)
                         message.edit_text(betting_msg, parse_mode=ParseMode.MARKDOWN)
                 except Exception as e:
@@ -242,17 +261,48 @@ class Mix(TrxBetBotPlugin):
         check = self.config.get("balance_check")
 
         context = {
+            "bet": bet,
             "tron": tron,
+            "resync": False,
+            "lock": threading.Lock(),  # Polling and block watcher can run at the same time
+            "transfers": list(),       # Transfers found by block watcher
+            "refunded": set(),         # Transfers returned to their sender
+            "payout": None,            # Future of queued payout
+            "auto_sent": not manual_mode,
+            "schedule": PollingSchedule.from_config(self.config.get("polling"), check),
+            "checks": 0,
             "choice": choice,
             "preset": preset,
             "update": update,
+            "chat_id": update.message.chat_id,
+            "reply_to": update.message.message_id,
             "start": time.time(),
             "message": message,
             "sc_trx": 0,     # Second chance TRX value
             "sc_win": False  # Second chance won or not
         }
 
-        self.repeat_job(self.scan_balance, check, first=first, context=context)
+        watcher = self.get_block_watcher()
+
+        # Transfer will be found by block watcher. Balance check is only a fallback
+        if watcher.is_alive():
+            check = self.global_config.get("block_watcher", "fallback_check") or check
+
+        # Transaction of auto-send is known. No need to wait for 'check_start'
+        if bet.bet_trx_id:
+            first = context["schedule"].next_interval(0, check, True)
+
+        job = self.repeat_job(self.scan_balance, check, first=first, context=context)
+
+        self.get_registry().add(PendingBet(
+            addr,
+            self.get_name(),
+            update.effective_user.id,
+            choice,
+            context["start"] + int(self.config.get("stop_check")),
+            chat_id=message.chat_id,
+            message_id=message.message_id,
+            job=job))
 
         logging.info(f"{addr} Initiated repeating job")
 
@@ -264,7 +314,8 @@ class Mix(TrxBetBotPlugin):
             return False
 
     def if_automix_then_stop(self, update, msg):
-        if self.is_automix(update):
+        # Resumed bets don't have an update
+        if update and self.is_automix(update):
             usr_id = update.effective_user.id
 
             # Get repeating job
@@ -305,6 +356,225 @@ class Mix(TrxBetBotPlugin):
         return [i for i in chars if i in self._VALID_CHARS]
 
     def scan_balance(self, bot, job):
+        bet = job.context["bet"]
+
+        with job.context["lock"]:
+            # Bet was already finished by block watcher or polling
+            if job.removed:
+                return
+
+            # Read data for this bet from database only if requested
+            if job.context["resync"]:
+                bet.reload()
+                job.context["resync"] = False
+                logging.info(f"Job {bet.bet_address} - Bet data reloaded")
+
+            job.context["checks"] += 1
+
+            try:
+                self._scan_balance(bot, job, bet)
+            finally:
+                # Write all changes of this run that are not saved yet
+                if not bet.flush():
+                    msg = f"Job {bet.bet_address} - Can't save bet data"
+                    logging.error(f"{msg}: {vars(bet)}")
+                    self.notify(msg)
+
+                if job.removed:
+                    self.get_registry().remove(bet.bet_address)
+
+                    # Transfers that arrived later will be returned
+                    if bet.bet_trx_id:
+                        self._schedule_return(job.context)
+
+                    logging.info(f"Job {bet.bet_address} - DB queries for this bet: {bet.queries}")
+                    logging.info(f"Job {bet.bet_address} - Node calls saved by polling schedule: {self.calls_saved(job)}")
+                else:
+                    self.reschedule(job)
+
+    def reschedule(self, job):
+        """ Set seconds until next balance check based on the polling schedule """
+        elapsed = time.time() - job.context["start"]
+        interval = job.context["schedule"].next_interval(elapsed, job.interval, job.context["auto_sent"])
+
+        # Transfers will be found by block watcher. Balance check is only a fallback
+        if self.get_block_watcher().is_alive():
+            interval = max(interval, self.global_config.get("block_watcher", "fallback_check") or interval)
+
+        job.interval = interval
+
+    def calls_saved(self, job):
+        """ Return number of balance checks that a fixed interval would have needed in addition """
+        first = self.config.get("check_start")
+        check = self.config.get("balance_check")
+
+        elapsed = time.time() - job.context["start"]
+        fixed = int(max(elapsed - first, 0) / check) + 1
+
+        return max(fixed - job.context["checks"], 0)
+
+    @TrxBetBotPlugin.threaded
+    def on_transfer(self, pending, transfer):
+        """ Called by the block watcher with a transfer to the betting address """
+        if not pending.job:
+            logging.warning(f"Job {pending.address} - No job to handle transfer: {transfer}")
+            return
+
+        pending.job.context["transfers"].append(transfer)
+        self.scan_balance(self._tgb.updater.bot, pending.job)
+
+    @TrxBetBotPlugin.threaded
+    def on_payout(self, job, future):
+        """ Called by the payout engine after the payout of a bet was sent.
+        Saves the payment even if the job already ended and finishes the bet """
+        with job.context["lock"]:
+            # Errors will be handled with the next check
+            if future.exception():
+                logging.error(f"Job {job.context['bet'].bet_address} - Payout failed: {future.exception()}")
+            else:
+                self._save_payout(job, future.result())
+
+        # Inform user right away instead of waiting for the next check
+        self.scan_balance(self._tgb.updater.bot, job)
+
+    @TrxBetBotPlugin.threaded
+    def on_win_bonus(self, bid, amount, future):
+        """ Called by the payout engine after the WIN bonus was sent """
+        if future.exception():
+            msg = f"{bid} - Couldn't payout WIN bonus: {future.exception()}"
+            logging.error(msg)
+            self.notify(msg)
+        else:
+            logging.info(f"{bid} - Payed {amount} WIN: {future.result()}")
+
+    def _save_payout(self, job, send_user):
+        """ Save transaction of the payout if not done yet. Call with lock """
+        bet = job.context["bet"]
+        bid = f"Job {bet.bet_address}"
+
+        if bet.pay_trx_id:
+            return
+
+        bet.pay_trx_id = send_user["transaction"]["txID"]
+        bet.pay_pending = None
+
+        # Payment needs to be saved right away
+        if not bet.flush():
+            msg = f"{bid} - Paid but can't save payment: {bet.pay_trx_id}"
+            logging.error(msg)
+            self.notify(msg)
+
+        if job.context['sc_win']:
+            logging.info(f"{bid} - Send from Bonus to User: {send_user}")
+        else:
+            logging.info(f"{bid} - Send from Bot to User: {send_user}")
+
+    def resync(self, address):
+        """ Reload data of a pending bet from the database on its next run.
+        Return TRUE if a pending bet was found, otherwise FALSE """
+        pending = self.get_registry().get(address)
+
+        if pending and pending.job and pending.game == self.get_name():
+            pending.job.context["resync"] = True
+            return True
+        return False
+
+    def load_pending(self):
+        """ Add bets from the database that are not finished yet to the registry """
+        stop_check = int(self.config.get("stop_check"))
+
+        sql = self.get_resource("select_pending.sql")
+        res = self.execute_sql(sql, f"-{stop_check} seconds")
+
+        if not res["success"]:
+            logging.error(f"Can't load pending bets: {res['data']}")
+            return
+
+        bets = list()
+        privkeys = dict()
+        for address, usr_id, choice, date_time, privkey in res["data"]:
+            start = datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+            bets.append(PendingBet(address, self.get_name(), usr_id, choice, start.timestamp() + stop_check))
+            privkeys[address] = privkey
+
+        added = self.get_registry().load(bets)
+        logging.info(f"Loaded {added} pending bets into registry")
+
+        self.resume_pending(privkeys)
+
+    def resume_pending(self, privkeys):
+        """ Create jobs for pending bets that lost their job (after a restart or a crash).
+        Saved data like the transaction and its block will not be retrieved again """
+        start = time.time()
+        timeout = self.config.get("resume_timeout") or 30
+
+        pending = [p for p in self.get_registry().by_game(self.get_name()) if not p.job and p.address in privkeys]
+
+        resumed = 0
+        for pending_bet in pending:
+            # Bets that are not resumed in time stay in the registry without a job
+            if (time.time() - start) > timeout:
+                logging.warning(f"Resuming pending bets stopped after {timeout} seconds")
+                break
+
+            try:
+                self._resume(pending_bet, privkeys[pending_bet.address], resumed)
+                resumed += 1
+            except Exception as e:
+                logging.error(f"Job {pending_bet.address} - Can't resume bet: {e}")
+
+        logging.info(f"Resumed {resumed} of {len(pending)} pending bets in {round(time.time() - start, 2)} seconds")
+
+    def _resume(self, pending, privkey, index):
+        tron = TRXAPI(private_key=privkey, default_address=pending.address)
+
+        # Reads saved data of the bet
+        bet = DBBet(self, pending.address, pending.choice, pending.usr_id)
+
+        check = self.config.get("balance_check")
+        preset = self.config.get("preset")[str(len(pending.choice))]
+
+        context = {
+            "bet": bet,
+            "tron": tron,
+            "resync": False,
+            "lock": threading.Lock(),  # Polling and block watcher can run at the same time
+            "transfers": list(),       # Transfers found by block watcher
+            "refunded": set(),         # Transfers returned to their sender
+            "payout": None,            # Future of queued payout
+            "auto_sent": bool(bet.bet_trx_id),
+            "schedule": PollingSchedule.from_config(self.config.get("polling"), check),
+            "checks": 0,
+            "choice": pending.choice,
+            "preset": preset,
+            "update": None,
+            "chat_id": int(pending.usr_id),  # Outcome will be sent to user in private chat
+            "reply_to": None,
+            "start": pending.deadline - int(self.config.get("stop_check")),
+            "message": None,
+            "sc_trx": bet.sc_trx or 0,   # Second chance TRX value
+            "sc_win": bool(bet.sc_trx)   # Second chance won or not
+        }
+
+        # Payout might have been sent without saving its transaction
+        if bet.pay_pending:
+            msg = f"Job {pending.address} - Not resumed. Payout was queued but its result is unknown"
+            logging.error(f"{msg}: {vars(bet)}")
+            self.notify(msg)
+
+            self.get_registry().remove(pending.address)
+            return
+
+        if self.get_block_watcher().is_alive():
+            check = self.global_config.get("block_watcher", "fallback_check") or check
+
+        # Spread first checks so that nodes don't get all requests at once
+        first = self.config.get("check_start") + (index % check)
+
+        pending.job = self.repeat_job(self.scan_balance, check, first=first, context=context)
+        logging.info(f"Job {pending.address} - Resumed bet: {vars(bet)}")
+
+    def _scan_balance(self, bot, job, bet):
         tron = job.context["tron"]
         start = job.context["start"]
         choice = job.context["choice"]
@@ -317,9 +587,6 @@ class Mix(TrxBetBotPlugin):
 
         bid = f"Job {bet_addr58}"
 
-        # Read data for this bet from database
-        bet = DBBet(self, bet_addr58, choice, update.effective_user.id)
-
         # Retrieve time in seconds to scan the balance
         time_frame = int(self.config.get("stop_check"))
 
@@ -343,19 +610,45 @@ class Mix(TrxBetBotPlugin):
                     self.notify(msg)
             return
 
-        try:
-            # Get balance (in "Sun") of generated address
-            balance = tron.trx.get_balance()
-        except Exception as e:
-            logging.error(f"{bid} - Can't retrieve balance: {e}")
-            return
+        transfers = job.context["transfers"]
 
-        # Check if balance is 0. If yes, rerun job in specified interval
-        if balance == 0:
-            logging.info(f"{bid} - Balance: 0 TRX")
-            return
+        # Transfers found by block watcher since the last run
+        while transfers:
+            transfer = transfers.pop(0)
+
+            # Block watcher found the first transfer
+            if not bet.bet_trx_id:
+                logging.info(f"{bid} - Transfer found by block watcher: {transfer}")
+
+                bet.bet_trx_id = transfer["txid"]
+                bet.usr_address = transfer["from"]
+                bet.usr_amount = transfer["amount"]
+
+            # Block watcher found the block of the known transaction
+            if transfer["txid"] == bet.bet_trx_id:
+                if not bet.bet_trx_block_hash:
+                    bet.bet_trx_block = transfer["block"]
+                    bet.bet_trx_block_hash = transfer["block_hash"]
+
+            # ... everything else will be returned
+            elif transfer["txid"] not in job.context["refunded"]:
+                self._return_transfer(bid, tron, bet, transfer, job.context["refunded"])
+
+        # Balance only needs to be checked until the transaction is known
+        if not bet.bet_trx_id:
+            try:
+                # Get balance (in "Sun") of generated address
+                balance = tron.re(tron.trx.get_balance)
+            except Exception as e:
+                logging.error(f"{bid} - Can't retrieve balance: {e}")
+                return
+
+            # Check if balance is 0. If yes, rerun job in specified interval
+            if balance == 0:
+                logging.info(f"{bid} - Balance: 0 TRX")
+                return
 
-        logging.info(f"{bid} - Balance: {tron.fromSun(balance)} TRX")
+            logging.info(f"{bid} - Balance: {tron.fromSun(balance)} TRX")
 
         # Check if we already found a saved transaction
         if not bet.bet_trx_id:
@@ -372,35 +665,19 @@ class Mix(TrxBetBotPlugin):
 
                 # We check just for TRX
                 if "asset_name" not in data:
-                    trx_id = trx["hash"]
-                    from_base58 = data["owner_address"]
-                    from_hex = Address().to_hex(from_base58)
-                    trx_balance = data["amount"]
-                    trx_amount = tron.fromSun(trx_balance)
+                    transfer = {"txid": trx["hash"], "from": data["owner_address"], "amount": data["amount"]}
 
                     # We only take the first transaction ...
                     if not found:
-                        bet.bet_trx_id = trx_id
-                        bet.usr_address = from_base58
-                        bet.usr_amount = trx_balance
+                        bet.bet_trx_id = transfer["txid"]
+                        bet.usr_address = transfer["from"]
+                        bet.usr_amount = transfer["amount"]
 
                         found = True
 
                     # ... everything else will be returned
-                    else:
-                        try:
-                            # Return funds from betting address to original address
-                            send = tron.trx.send(from_hex, float(trx_amount))
-
-                            # An error was returned
-                            if "code" in send and "message" in send:
-                                raise Exception(send["message"])
-
-                            msg = "Returned from Generated to User (not first transaction)"
-                            logging.info(f"{bid} - {msg}: {send}")
-                        except Exception as e:
-                            msg = "Can't return from Generated to User (not first transaction)"
-                            logging.error(f"{bid} - {msg}: {e}")
+                    elif transfer["txid"] not in job.context["refunded"]:
+                        self._return_transfer(bid, tron, bet, transfer, job.context["refunded"])
 
         # Check if a transaction was found
         if not bet.bet_trx_id:
@@ -435,6 +712,11 @@ class Mix(TrxBetBotPlugin):
             self.if_automix_then_stop(update, msg)
             logging.info(f"{bid} - Automix stopped. TRX amount out of min / max boundaries")
 
+            # Save bet data before returning funds
+            if not bet.flush():
+                logging.error(f"{bid} - Can't save bet data before returning funds")
+                return
+
             try:
                 # Send funds from betting address to original address
                 send = tron.trx.send(from_hex, amo)
@@ -448,8 +730,16 @@ class Mix(TrxBetBotPlugin):
                 logging.error(f"{bid} - Can't send from Generated to User: {e}")
                 return
 
+            # Returned amount is saved as payment so that it's not returned again
+            bet.pay_amount = bet.usr_amount
+            bet.pay_trx_id = send["transaction"]["txID"]
+
             try:
-                update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
+                bot.send_message(
+                    chat_id=job.context["chat_id"],
+                    text=msg,
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_to_message_id=job.context["reply_to"])
             except Exception as e:
                 logging.warning(f"{bid} - Can't send funds back for min / max violation: {e}")
 
@@ -462,12 +752,22 @@ class Mix(TrxBetBotPlugin):
         # Check if we already know the block
         if not bet.bet_trx_block:
             try:
-                info = tron.trx.get_transaction_info(bet.bet_trx_id)
+                info = self.get_confirmations().transaction_info(tron, bet.bet_trx_id)
                 logging.info(f"{bid} - Get Transaction Info: {info}")
             except Exception as e:
                 logging.error(f"{bid} - Can't retrieve transaction info: {e}")
                 return
 
+            # Auto-sent transaction was broadcasted but not executed
+            if info.get("result") == "FAILED":
+                logging.error(f"{bid} - Transaction {bet.bet_trx_id} failed: {info}")
+
+                # Search for transactions again
+                bet.bet_trx_id = None
+                bet.usr_address = None
+                bet.usr_amount = None
+                return
+
             if "blockNumber" not in info:
                 logging.info(f"{bid} - Key 'blockNumber' not in info: {info}")
                 return
@@ -477,22 +777,18 @@ class Mix(TrxBetBotPlugin):
         # Check if we already know the block hash
         if not bet.bet_trx_block_hash:
             try:
-                block = tron.trx.get_block(bet.bet_trx_block)
-                logging.info(f"{bid} - Get Block: {block}")
+                bet.bet_trx_block_hash = self.get_block_cache().block_id(tron, bet.bet_trx_block)
+                logging.info(f"{bid} - Get Block ID: {bet.bet_trx_block_hash}")
             except Exception as e:
                 logging.error(f"{bid} - Can't retrieve block info: {e}")
                 return
 
-            bet.bet_trx_block_hash = block["blockID"]
-
         logging.info(f"{bid} - "
                      f"TXID: {bet.bet_trx_id} - "
                      f"Sender: {bet.usr_address} - "
                      f"Block: {bet.bet_trx_block} - "
                      f"Block Hash: {bet.bet_trx_block_hash}")
 
-        bot_addr = self.get_tron().default_address.hex
-
         # Determine if bet was won or lost
         # But only if not already saved
         if bet.bet_won is None:
@@ -513,6 +809,7 @@ class Mix(TrxBetBotPlugin):
                     if random_number < (bonus["chance"] / 100):
                         job.context['sc_trx'] = bonus["trx"]
                         job.context['sc_win'] = True
+                        bet.sc_trx = bonus["trx"]
                         bet.bet_won = "true"
                         logging.info(
                             f"{bid} - "
@@ -561,34 +858,46 @@ class Mix(TrxBetBotPlugin):
 
             # Pay winning amount if not done yet
             if not bet.pay_trx_id:
-                try:
-                    if job.context['sc_win']:
-                        params = dict()
-                        params["private_key"] = self.config.get("bonus_privkey")
-                        params["default_address"] = Address.from_private_key(params["private_key"])["base58"]
-
-                        # Initiate wallet for bonus payments
-                        bonus_tron = Tron(**params)
+                # Outcome needs to be saved before paying
+                if not bet.flush():
+                    logging.error(f"{bid} - Can't save bet data before paying winnings")
+                    return
 
+                # Payout is only queued once and picked up again with the next check
+                if not job.context["payout"]:
+                    if job.context['sc_win']:
                         # Send funds from bonus wallet to user address
-                        send_user = bonus_tron.trx.send(from_hex, float(winnings_trx))
+                        privkey = self.config.get("bonus_privkey")
                     else:
                         # Send funds from bot wallet to user address
-                        send_user = self.get_tron().trx.send(from_hex, float(winnings_trx))
+                        privkey = None
 
-                    # An error was returned
-                    if "code" in send_user and "message" in send_user:
-                        raise Exception(send_user["message"])
+                    # Resumed bets with this marker will not be paid again
+                    bet.pay_pending = 1
 
-                    bet.pay_trx_id = send_user["transaction"]["txID"]
+                    if not bet.flush():
+                        logging.error(f"{bid} - Can't save bet data before paying winnings")
+                        return
 
-                    if job.context['sc_win']:
-                        logging.info(f"{bid} - Send from Bonus to User: {send_user}")
-                    else:
-                        logging.info(f"{bid} - Send from Bot to User: {send_user}")
+                    payout = self.get_payouts().submit(from_hex, float(winnings_trx), privkey, key=bet.bet_address)
+                    payout.add_done_callback(lambda future: self.on_payout(job, future))
+
+                    job.context["payout"] = payout
+
+                # Result will be saved by 'on_payout()' as soon as it's there
+                if not job.context["payout"].done():
+                    logging.info(f"{bid} - Payout not sent yet")
+                    return
+
+                try:
+                    self._save_payout(job, job.context["payout"].result())
                 except Exception as e:
                     logging.error(f"{bid} - Can't send from Bot to User: {e}")
 
+                    # Queue payout again with the next check
+                    job.context["payout"] = None
+                    bet.pay_pending = None
+
                     if "Cannot transfer TRX to the same account" in str(e):
                         logging.info(f"{bid} - Ending job")
                         self.notify(f"Bet {bet_addr58} - {e}")
@@ -626,22 +935,10 @@ class Mix(TrxBetBotPlugin):
 
         # --------------- General ---------------
 
-        # Check if we already sent funds from generated wallet to bot wallet
-        if not bet.rtn_trx_id:
-            try:
-                # Send funds from generated address to bot address
-                send_bot = tron.trx.send(bot_addr, amo)
-
-                # An error was returned
-                if "code" in send_bot and "message" in send_bot:
-                    raise Exception(send_bot["message"])
-
-                logging.info(f"{bid} - Send from Generated to Bot: {send_bot}")
-            except Exception as e:
-                logging.error(f"{bid} - Can't send from Generated to Bot: {e}")
-                return
-
-            bet.rtn_trx_id = send_bot["transaction"]["txID"]
+        # Outcome and payment need to be saved. Funds will be moved to the bot wallet by the sweeper
+        if not bet.flush():
+            logging.error(f"{bid} - Can't save outcome of bet")
+            return
 
         job.schedule_removal()
         logging.info(f"{bid} - Scheduled job for removal")
@@ -658,18 +955,18 @@ class Mix(TrxBetBotPlugin):
         with open(image_final, "rb") as picture:
             try:
                 message = bot.send_animation(
-                    chat_id=update.message.chat_id,
+                    chat_id=job.context["chat_id"],
                     animation=picture,
                     caption=msg,
                     parse_mode=ParseMode.MARKDOWN,
                     disable_web_page_preview=True,
-                    reply_to_message_id=update.message.message_id)
+                    reply_to_message_id=job.context["reply_to"])
             except Exception as e:
                 logging.error(f"{bid} - Couldn't send outcome message: {e}")
 
         if bet.bet_won == "false":
             if message:
-                if bot.get_chat(update.message.chat_id).type == Chat.PRIVATE:
+                if bot.get_chat(job.context["chat_id"]).type == Chat.PRIVATE:
                     remove_time = self.config.get("private_remove_after")
                 else:
                     remove_time = self.config.get("public_remove_after")
@@ -685,7 +982,9 @@ class Mix(TrxBetBotPlugin):
 
         # Inform admins that user won with second chance
         if job.context['sc_win']:
-            if update.effective_user.username:
+            if not update:
+                u = bet.usr_id
+            elif update.effective_user.username:
                 u = f"@{update.effective_user.username}"
             else:
                 u = update.effective_user.first_name
@@ -723,8 +1022,9 @@ class Mix(TrxBetBotPlugin):
                             win_to_pay = amo / float(trx)
 
                             if win_to_pay > 0:
-                                sent_win = TRC20().send("WIN", self.get_tron(), bet.usr_address, win_to_pay)
-                                logging.info(f"{bid} - Payed {win_to_pay} WIN to {bet.usr_address}: {sent_win}")
+                                sent_win = self.get_payouts().submit_token("WIN", bet.usr_address, win_to_pay)
+                                sent_win.add_done_callback(lambda future: self.on_win_bonus(bid, win_to_pay, future))
+                                logging.info(f"{bid} - Queued {win_to_pay} WIN for {bet.usr_address}")
                             else:
                                 logging.info(f"{bid} - No WIN bonus payed")
                             break
@@ -744,7 +1044,60 @@ class Mix(TrxBetBotPlugin):
                 return False
         return True
 
+    def _return_transfer(self, bid, tron, bet, transfer, refunded):
+        """ Return transfer that doesn't belong to the bet to its sender """
+
+        # Save first transaction before returning funds
+        if not bet.flush():
+            logging.error(f"{bid} - Can't save bet data before returning funds")
+            return
+
+        try:
+            Refund(tron).send(transfer, refunded)
+
+            msg = "Returned from Generated to User (not first transaction)"
+            logging.info(f"{bid} - {msg}: {transfer}")
+        except Exception as e:
+            msg = "Can't return from Generated to User (not first transaction)"
+            logging.error(f"{bid} - {msg}: {e}")
+
+    def _schedule_return(self, context, attempt=1):
+        """ Look for transfers of a finished bet that need to be returned. Tronscan
+        needs some time to list the latest transactions, so it runs delayed """
+        context = dict(context, attempt=attempt)
+        self.run_job(self._return_extra, self.config.get("check_start"), context=context)
+
+    def _return_extra(self, bot, job):
+        bet = job.context["bet"]
+        tron = job.context["tron"]
+        attempt = job.context["attempt"]
+
+        bid = f"Job {bet.bet_address}"
+
+        try:
+            transactions = self.tronscan.get_transactions_for(bet.bet_address)
+        except Exception as e:
+            if attempt < self._RETURN_ATTEMPTS:
+                logging.warning(f"{bid} - Can't check for transfers to return (attempt {attempt}): {e}")
+                self._schedule_return(job.context, attempt + 1)
+            else:
+                msg = f"{bid} - Can't check for transfers to return: {e}"
+                logging.error(msg)
+                self.notify(msg)
+            return
+
+        with job.context["lock"]:
+            refunded = job.context["refunded"]
+            transfers = Refund(tron).open_transfers(transactions["data"], bet.bet_trx_id, bet.pay_trx_id, refunded)
+
+            for transfer in transfers:
+                self._return_transfer(bid, tron, bet, transfer, refunded)
+
     def remove_message(self, bot, message, bet_addr58):
+        # Resumed bets don't have a betting message
+        if not message:
+            return
+
         try:
             chat_id = message.chat_id
             msg_id = message.message_id
@@ -755,15 +1108,26 @@ class Mix(TrxBetBotPlugin):
 
 
 class DBBet:
+    """ Bet data from database. Changed values are collected and
+    written with one UPDATE statement when 'flush()' is called """
 
     def __init__(self, bet: Mix, address, chars, user_id):
+        self.bet = bet
+        self.dirty = set()
+
+        # Number of executed statements for this bet
+        self.queries = 0
+
         sql = bet.get_resource("insert_ignore.sql")
-        bet.execute_sql(sql, address, chars, user_id)
+        self._execute(sql, address, chars, user_id)
 
-        sql = bet.get_resource("select_bet.sql")
-        res = bet.execute_sql(sql, address)
+        self.bet_address = address
+        self.reload()
 
-        self.bet = bet
+    def reload(self):
+        """ Read bet data from database again. Changes that are not flushed will be lost """
+        sql = self.bet.get_resource("select_bet.sql")
+        res = self._execute(sql, self.bet_address)
 
         self.bet_address = res["data"][0][0]  # Can only be read
         self.bet_chars = res["data"][0][1]  # Can only be read
@@ -777,7 +1141,12 @@ class DBBet:
         self.pay_amount = res["data"][0][9]
         self.pay_trx_id = res["data"][0][10]
         self.date_time = res["data"][0][11]
-        self.rtn_trx_id = res["data"][0][12]
+        self.rtn_trx_id = res["data"][0][12]  # Can only be read (set by sweeper)
+        self.sc_trx = res["data"][0][13]
+        self.pay_pending = res["data"][0][14]
+
+        # Loaded values don't need to be written
+        self.dirty.clear()
 
     @property
     def usr_address(self):
@@ -785,9 +1154,8 @@ class DBBet:
 
     @usr_address.setter
     def usr_address(self, new_value):
-        sql = self.get_sql("usr_address")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__usr_address = new_value
+        self.dirty.add("usr_address")
 
     @property
     def usr_amount(self):
@@ -795,9 +1163,8 @@ class DBBet:
 
     @usr_amount.setter
     def usr_amount(self, new_value):
-        sql = self.get_sql("usr_amount")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__usr_amount = new_value
+        self.dirty.add("usr_amount")
 
     @property
     def bet_trx_id(self):
@@ -805,9 +1172,8 @@ class DBBet:
 
     @bet_trx_id.setter
     def bet_trx_id(self, new_value):
-        sql = self.get_sql("bet_trx_id")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__bet_trx_id = new_value
+        self.dirty.add("bet_trx_id")
 
     @property
     def bet_trx_block(self):
@@ -815,9 +1181,8 @@ class DBBet:
 
     @bet_trx_block.setter
     def bet_trx_block(self, new_value):
-        sql = self.get_sql("bet_trx_block")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__bet_trx_block = new_value
+        self.dirty.add("bet_trx_block")
 
     @property
     def bet_trx_block_hash(self):
@@ -825,9 +1190,8 @@ class DBBet:
 
     @bet_trx_block_hash.setter
     def bet_trx_block_hash(self, new_value):
-        sql = self.get_sql("bet_trx_block_hash")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__bet_trx_block_hash = new_value
+        self.dirty.add("bet_trx_block_hash")
 
     @property
     def bet_won(self):
@@ -835,9 +1199,8 @@ class DBBet:
 
     @bet_won.setter
     def bet_won(self, new_value):
-        sql = self.get_sql("bet_won")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__bet_won = new_value
+        self.dirty.add("bet_won")
 
     @property
     def pay_amount(self):
@@ -845,9 +1208,8 @@ class DBBet:
 
     @pay_amount.setter
     def pay_amount(self, new_value):
-        sql = self.get_sql("pay_amount")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__pay_amount = new_value
+        self.dirty.add("pay_amount")
 
     @property
     def pay_trx_id(self):
@@ -855,22 +1217,61 @@ class DBBet:
 
     @pay_trx_id.setter
     def pay_trx_id(self, new_value):
-        sql = self.get_sql("pay_trx_id")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
         self.__pay_trx_id = new_value
+        self.dirty.add("pay_trx_id")
+
+    @property
+    def sc_trx(self):
+        return self.__sc_trx
+
+    @sc_trx.setter
+    def sc_trx(self, new_value):
+        self.__sc_trx = new_value
+        self.dirty.add("sc_trx")
 
     @property
-    def rtn_trx_id(self):
-        return self.__rtn_trx_id
+    def pay_pending(self):
+        return self.__pay_pending
+
+    @pay_pending.setter
+    def pay_pending(self, new_value):
+        self.__pay_pending = new_value
+        self.dirty.add("pay_pending")
+
+    def flush(self):
+        """ Write all changed values to the database in one transaction.
+        Return TRUE if everything is saved, otherwise FALSE """
+        if not self.dirty:
+            return True
 
-    @rtn_trx_id.setter
-    def rtn_trx_id(self, new_value):
-        sql = self.get_sql("rtn_trx_id")
-        self.bet.execute_sql(sql, new_value, self.bet_address)
-        self.__rtn_trx_id = new_value
+        sql = self.bet.get_resource("update_bet.sql")
+        res = self._execute(
+            sql,
+            self.usr_address,
+            self.usr_amount,
+            self.bet_trx_id,
+            self.bet_trx_block,
+            self.bet_trx_block_hash,
+            self.bet_won,
+            self.pay_amount,
+            self.pay_trx_id,
+            self.sc_trx,
+            self.pay_pending,
+            self.bet_address)
+
+        if not res["success"]:
+            return False
 
-    def get_sql(self, variable):
-        return f"UPDATE bets SET {variable} = ? WHERE bet_address = ?"
+        self.dirty.clear()
+        return True
 
     def is_complete(self):
-        return None not in vars(self).values()
+        """ Return TRUE if all data of the bet is present. Funds might
+        not be swept yet, so 'rtn_trx_id' doesn't need to be set. Second
+        chance and payout marker are only set for some bets """
+        optional = ["rtn_trx_id", "_DBBet__sc_trx", "_DBBet__pay_pending"]
+        return None not in [v for k, v in vars(self).items() if k not in optional]
+
+    def _execute(self, sql, *args):
+        self.queries += 1
+        return self.bet.execute_sql(sql, *args)
@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS idx_bets_unswept ON bets (date_time) WHERE rtn_trx_id IS NULL;
\ No newline at end of file
@@ -0,0 +1,2 @@
+ALTER TABLE bets ADD COLUMN sc_trx INTEGER;
+ALTER TABLE bets ADD COLUMN pay_pending INTEGER;
\ No newline at end of file
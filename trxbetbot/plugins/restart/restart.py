@@ -47,5 +47,13 @@ class Restart(TrxBetBotPlugin):
         m_name = __spec__.name
         m_name = m_name[:m_name.index(".")]
 
+        # Queued payouts need to be sent before the process gets replaced
+        self.get_payouts().stop()
+
+        # Give games time to save the results of the payouts
         time.sleep(1)
+
+        # Process will be replaced so connections need to be closed now
+        self.get_db().close_all()
+
         os.execl(sys.executable, sys.executable, '-m', m_name, *sys.argv[1:])
@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE INDEX IF NOT EXISTS idx_addresses_date_time ON addresses (date_time);
\ No newline at end of file
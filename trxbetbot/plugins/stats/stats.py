@@ -1,4 +1,4 @@
-import time
+import math
 import trxbetbot.emoji as emo
 import trxbetbot.utils as utl
 
@@ -10,7 +10,6 @@ from trxbetbot.trongrid import Trongrid
 
 class Stats(TrxBetBotPlugin):
 
-    MAX_DATA = 200
     DEF_TIME = 24
 
     @TrxBetBotPlugin.owner
@@ -43,39 +42,26 @@ class Stats(TrxBetBotPlugin):
         h = self.DEF_TIME if len(args) == 0 else float(args[0])
         last_24_hours = datetime.utcnow() - timedelta(hours=h)
 
-        tg = Trongrid()
-
-        tx_kwargs = dict()
-        tx_kwargs["limit"] = self.MAX_DATA
-        tx_kwargs["min_timestamp"] = utl.to_unix_time(last_24_hours, millis=True)
+        # Every hour is requested concurrently
+        transactions = Trongrid().get_all_transactions(
+            addr_base58,
+            utl.to_unix_time(last_24_hours, millis=True),
+            utl.to_unix_time(datetime.utcnow(), millis=True),
+            slices=math.ceil(h))
 
         to_bot = list()
         from_bot = list()
 
-        delay = self.config.get("delay")
-
-        while True:
-            # Get all transactions from or to bot address
-            transactions = tg.get_transactions(addr_base58, **tx_kwargs)
-
-            for tx in transactions["data"]:
-                value = tx["raw_data"]["contract"][0]["parameter"]["value"]
-
-                if "amount" in value:
-                    trx_amount = value["amount"]
-
-                    if value["to_address"].upper() == addr_hex.upper():
-                        to_bot.append(trx_amount)
-                    else:
-                        from_bot.append(trx_amount)
+        for tx in transactions:
+            value = tx["raw_data"]["contract"][0]["parameter"]["value"]
 
-            # End loop if we got less than the requested max number of transactions
-            if not len(transactions["data"]) == self.MAX_DATA:
-                break
+            if "amount" in value:
+                trx_amount = value["amount"]
 
-            # Set fingerprint of last request to continue the next one
-            tx_kwargs["fingerprint"] = transactions["meta"]["fingerprint"]
-            time.sleep(delay)
+                if value["to_address"].upper() == addr_hex.upper():
+                    to_bot.append(trx_amount)
+                else:
+                    from_bot.append(trx_amount)
 
         in_trx = self.get_tron().fromSun(sum(to_bot))
         out_trx = self.get_tron().fromSun(sum(from_bot))
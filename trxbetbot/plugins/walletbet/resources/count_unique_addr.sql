@@ -1,3 +1,4 @@
-SELECT DISTINCT	usr_address
-FROM (SELECT * FROM bets WHERE usr_address IS NOT NULL)
-WHERE date_time >= datetime('now', ?)
\ No newline at end of file
+SELECT game, Count(DISTINCT usr_address)
+FROM all_bets
+WHERE usr_address IS NOT NULL AND date_time >= datetime('now', ?)
+GROUP BY game
\ No newline at end of file
@@ -27,14 +27,14 @@ class Walletbet(TrxBetBotPlugin):
                 return
 
         sql = self.get_resource("count_unique_addr.sql")
-        res_bet = self.execute_sql(sql, f"-{days} day", plugin="bet")
-        res_mix = self.execute_sql(sql, f"-{days} day", plugin="mix")
-        res_win = self.execute_sql(sql, f"-{days} day", plugin="win")
-
-        # Current data
-        bet = len(res_bet['data']) if res_bet['data'] else 0
-        mix = len(res_mix['data']) if res_mix['data'] else 0
-        win = len(res_win['data']) if res_win['data'] else 0
+        res = self.execute_analytics_sql(sql, f"-{days} day")
+
+        # Current data per game
+        games = dict(res['data']) if res['data'] else dict()
+
+        bet = games.get("bet", 0)
+        mix = games.get("mix", 0)
+        win = games.get("win", 0)
         total = bet + mix + win
 
         msg = f"*Users who placed bets in last {days} days*\n\n" \
@@ -1,3 +1,4 @@
-SELECT Count(*)
-FROM (SELECT * FROM bets WHERE usr_address IS NOT NULL)
-WHERE date_time >= datetime('now', ?)
\ No newline at end of file
+SELECT game, Count(*)
+FROM all_bets
+WHERE usr_address IS NOT NULL AND date_time >= datetime('now', ?)
+GROUP BY game
\ No newline at end of file
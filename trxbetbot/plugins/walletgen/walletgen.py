@@ -27,9 +27,7 @@ class Walletgen(TrxBetBotPlugin):
                 return
 
         sql = self.get_resource("count_bets_date.sql")
-        res_bet = self.execute_sql(sql, f"-{days} day", plugin="bet")
-        res_mix = self.execute_sql(sql, f"-{days} day", plugin="mix")
-        res_win = self.execute_sql(sql, f"-{days} day", plugin="win")
+        res = self.execute_analytics_sql(sql, f"-{days} day")
 
         sql = self.get_resource("count_addr_date.sql")
         res_global = self.execute_global_sql(sql, f"-{days} day")
@@ -39,10 +37,12 @@ class Walletgen(TrxBetBotPlugin):
         h_mix = self.config.get("past_mix_addr")
         h_win = self.config.get("past_win_addr")
 
-        # Current data
-        bet = res_bet['data'][0][0] if res_bet['data'] else 0
-        mix = res_mix['data'][0][0] if res_mix['data'] else 0
-        win = res_win['data'][0][0] if res_win['data'] else 0
+        # Current data per game
+        games = dict(res['data']) if res['data'] else dict()
+
+        bet = games.get("bet", 0)
+        mix = games.get("mix", 0)
+        win = games.get("win", 0)
         usr = res_global['data'][0][0] if res_global['data'] else 0
         total = bet + mix + win + usr
 
@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_bets_date_time ON bets (date_time);
+CREATE INDEX IF NOT EXISTS idx_bets_usr_amount ON bets (usr_amount);
+CREATE INDEX IF NOT EXISTS idx_addresses_date_time ON addresses (date_time);
\ No newline at end of file
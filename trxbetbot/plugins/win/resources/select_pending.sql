@@ -0,0 +1,4 @@
+SELECT b.bet_address, b.usr_id, b.bet_chars, b.date_time, a.privkey
+FROM bets b
+JOIN addresses a ON a.address = b.bet_address
+WHERE b.pay_trx_id IS NULL AND b.date_time >= datetime('now', ?)
\ No newline at end of file
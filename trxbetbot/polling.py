@@ -0,0 +1,64 @@
+class PollingSchedule:
+    """
+    Decides how many seconds to wait until the next balance check of a bet.
+
+    This base schedule always uses the same interval. Other schedules can be
+    added by overwriting 'next_interval' and adding them to 'from_config'.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def next_interval(self, elapsed, current, auto_sent=False):
+        """ Return seconds until next check. 'elapsed' are the seconds since the
+        bet started, 'current' is the current interval and 'auto_sent' is TRUE
+        if the bet amount was already sent from the wallet of the user """
+        return self.interval
+
+    @staticmethod
+    def from_config(config, interval):
+        """ Return schedule for the 'polling' section of a game config.
+        Without configuration the fixed 'interval' will be used """
+        if not config:
+            return PollingSchedule(interval)
+
+        schedule = config.get("type", "fixed")
+
+        if schedule == "fixed":
+            return PollingSchedule(config.get("interval", interval))
+
+        if schedule == "backoff":
+            return BackoffSchedule(
+                fast_for=config.get("fast_for", 120),
+                fast_interval=config.get("fast_interval", interval),
+                factor=config.get("factor", 2),
+                max_interval=config.get("max_interval", 120),
+                auto_send_interval=config.get("auto_send_interval"))
+
+        raise ValueError(f"Unknown polling schedule '{schedule}'")
+
+
+class BackoffSchedule(PollingSchedule):
+    """
+    Checks every 'fast_interval' seconds during the first 'fast_for' seconds
+    and then multiplies the interval by 'factor' after every check until
+    'max_interval' is reached. Bets that were already sent from the wallet
+    of the user will be checked every 'auto_send_interval' seconds.
+    """
+
+    def __init__(self, fast_for=120, fast_interval=10, factor=2, max_interval=120, auto_send_interval=None):
+        super().__init__(fast_interval)
+
+        self.fast_for = fast_for
+        self.factor = factor
+        self.max_interval = max_interval
+        self.auto_send_interval = auto_send_interval
+
+    def next_interval(self, elapsed, current, auto_sent=False):
+        if auto_sent and self.auto_send_interval:
+            return self.auto_send_interval
+
+        if elapsed < self.fast_for:
+            return self.interval
+
+        return min(max(current, self.interval) * self.factor, self.max_interval)
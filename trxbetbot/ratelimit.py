@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import threading
+import trxbetbot.constants as con
+
+from trxbetbot.config import ConfigManager as Cfg
+
+
+class RateLimitError(Exception):
+    """ Raised if no request can be sent to an API in time """
+
+
+class TokenBucket:
+    """
+    Allows 'rate' requests per second on average and bursts
+    of up to 'burst' requests after a period without requests.
+    """
+
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    def refill(self):
+        """ Add tokens for the time since the last refill """
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def take(self):
+        """ Return TRUE if a token could be taken """
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def empty(self):
+        self._tokens = 0
+
+    def wait(self):
+        """ Return seconds until the next token is available """
+        return max(0, (1 - self._tokens) / self._rate)
+
+    def level(self):
+        return round(self._tokens, 1)
+
+
+class RateLimiter:
+    """
+    Process-wide token buckets per API host.
+
+    Only hosts in 'hosts' of the 'rate_limit' config are limited. Every
+    configured API key of a host gets its own bucket and the key with the
+    most tokens will be used for the next request so that the quota grows
+    with the number of keys. Requests with HIGH priority wait up to 'timeout'
+    seconds for a token, requests with LOW priority fail immediately.
+    """
+
+    HIGH = "high"
+    LOW = "low"
+
+    HEADER = "TRON-PRO-API-KEY"
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, hosts=None, timeout=30):
+        self._timeout = timeout
+        self._lock = threading.Lock()
+
+        # Host -> API key (or None) -> bucket
+        self._buckets = dict()
+
+        for host, limit in (hosts or dict()).items():
+            keys = limit.get("keys") or [None]
+            self._buckets[host] = {key: TokenBucket(limit["rate"], limit["burst"]) for key in keys}
+
+        self.waited = 0
+        self.rejected = 0
+
+    @classmethod
+    def shared(cls):
+        """ Return rate limiter that is shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                cls._shared = RateLimiter(
+                    hosts=cls.cfg.get("rate_limit", "hosts"),
+                    timeout=cls.cfg.get("rate_limit", "timeout") or 30)
+            return cls._shared
+
+    def acquire(self, host, priority=HIGH):
+        """ Take a token for given host and return the API key
+        to use (or None). Raise RateLimitError if there is no token """
+        deadline = time.monotonic() + self._timeout
+        waited = False
+
+        while True:
+            taken, key, wait = self._take(host, priority, deadline, waited)
+
+            if taken:
+                return key
+
+            waited = True
+            time.sleep(wait)
+
+    async def acquire_async(self, host, priority=HIGH):
+        """ Same as 'acquire()' but waits without blocking the event loop """
+        deadline = time.monotonic() + self._timeout
+        waited = False
+
+        while True:
+            taken, key, wait = self._take(host, priority, deadline, waited)
+
+            if taken:
+                return key
+
+            waited = True
+            await asyncio.sleep(wait)
+
+    def throttle(self, host, key=None):
+        """ Take all tokens of a key after the API rejected a request """
+        buckets = self._buckets.get(host)
+
+        if buckets and key in buckets:
+            with self._lock:
+                buckets[key].empty()
+
+    def _take(self, host, priority, deadline, waited):
+        """ Return if a token was taken, the API key
+        and seconds until the next token is available """
+        buckets = self._buckets.get(host)
+
+        if not buckets:
+            return True, None, 0
+
+        with self._lock:
+            for bucket in buckets.values():
+                bucket.refill()
+
+            key, bucket = max(buckets.items(), key=lambda item: item[1].level())
+
+            if bucket.take():
+                if waited:
+                    self.waited += 1
+                return True, key, 0
+
+            wait = min(b.wait() for b in buckets.values())
+
+            if priority == self.LOW or time.monotonic() + wait > deadline:
+                self.rejected += 1
+                raise RateLimitError(f"Rate limit for {host} reached")
+
+            return False, None, wait
+
+    def stats(self):
+        """ Return current token level per host and API key """
+        hosts = dict()
+
+        with self._lock:
+            for host, buckets in self._buckets.items():
+                for bucket in buckets.values():
+                    bucket.refill()
+
+                hosts[host] = {
+                    (f"...{key[-4:]}" if key else "no key"): bucket.level()
+                    for key, bucket in buckets.items()}
+
+            return {
+                "hosts": hosts,
+                "waited": self.waited,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,84 @@
+import logging
+
+from tronapi.main import Address
+from collections import Counter
+
+
+class Refund:
+    """
+    Returns transfers to a betting address that don't belong to the bet.
+
+    Only the first transfer to a betting address is the bet. Every other
+    transfer gets returned to the address it was sent from. Transfers that
+    were already returned are recognized by the outgoing transfers of the
+    betting address (same receiver and same amount), so nothing is returned
+    twice. That also works after a restart.
+    """
+
+    def __init__(self, tron):
+        self.tron = tron
+        self.address = tron.default_address.base58
+
+        # Address is bytes if it was set as hex
+        if isinstance(self.address, bytes):
+            self.address = self.address.decode()
+
+    def open_transfers(self, transactions, bet_trx_id, pay_trx_id=None, refunded=None):
+        """ Return list of incoming transfers (dict with 'txid', 'from' and
+        'amount') from Tronscan transactions that need to be returned.
+        'pay_trx_id' is skipped because it can be the refund of the bet
+        itself. Transfers with a txid in 'refunded' were already returned """
+        refunded = refunded or set()
+
+        incoming = list()
+        returned = Counter()
+
+        for trx in transactions:
+            data = trx["contractData"]
+
+            # We check just for successful TRX transfers
+            if "asset_name" in data or trx.get("contractRet", "SUCCESS") != "SUCCESS":
+                continue
+
+            if data.get("to_address") == self.address:
+                if trx["hash"] != bet_trx_id:
+                    incoming.append({"txid": trx["hash"], "from": data["owner_address"], "amount": data["amount"]})
+            elif data.get("owner_address") == self.address and trx["hash"] != pay_trx_id:
+                returned[(data.get("to_address"), data["amount"])] += 1
+
+        transfers = list()
+
+        # Known refunds first so that they don't match other transfers
+        incoming.sort(key=lambda transfer: transfer["txid"] not in refunded)
+
+        for transfer in incoming:
+            key = (transfer["from"], transfer["amount"])
+
+            # Already returned
+            if transfer["txid"] in refunded:
+                returned[key] -= 1
+                continue
+
+            # Already returned in an earlier run
+            if returned[key] > 0:
+                returned[key] -= 1
+                continue
+
+            transfers.append(transfer)
+
+        return transfers
+
+    def send(self, transfer, refunded=None):
+        """ Return transfer to the address it was sent from. Return
+        txid of the refund. Raises an exception if it can't be sent """
+        send = self.tron.trx.send(Address().to_hex(transfer["from"]), float(self.tron.fromSun(transfer["amount"])))
+
+        # An error was returned
+        if "code" in send and "message" in send:
+            raise Exception(send["message"])
+
+        if refunded is not None:
+            refunded.add(transfer["txid"])
+
+        logging.info(f"Returned {transfer} from {self.address}: {send}")
+        return send["transaction"]["txID"]
@@ -0,0 +1,142 @@
+import time
+import heapq
+import logging
+import threading
+
+from tronapi.main import Address
+
+
+class PendingBet:
+    """ Compact record of a bet that is still waiting for its transfer or outcome """
+
+    __slots__ = ("address", "hex", "game", "usr_id", "choice", "chat_id", "message_id", "deadline", "job")
+
+    def __init__(self, address, game, usr_id, choice, deadline, chat_id=None, message_id=None, job=None):
+        self.address = address
+        self.hex = Address().to_hex(address).lower()
+        self.game = game
+        self.usr_id = str(usr_id)
+        self.choice = choice
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.deadline = deadline
+        self.job = job
+
+    def __repr__(self):
+        return f"PendingBet({self.game} {self.address} user {self.usr_id} choice {self.choice})"
+
+
+class BetRegistry:
+    """
+    Process-wide registry of all pending bets of all games.
+
+    Bets can be looked up by their generated address (base58 or hex), by user
+    and by the time at which they expire. Games add a bet as soon as it starts
+    and remove it once it is finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # Base58 address -> PendingBet
+        self._by_address = dict()
+        # Hex address -> PendingBet
+        self._by_hex = dict()
+        # User ID -> set of base58 addresses
+        self._by_user = dict()
+        # Heap of (deadline, base58 address)
+        self._expiry = list()
+
+    def add(self, bet: PendingBet):
+        """ Add pending bet or replace the one with the same address """
+        with self._lock:
+            self._remove(bet.address)
+
+            self._by_address[bet.address] = bet
+            self._by_hex[bet.hex] = bet
+            self._by_user.setdefault(bet.usr_id, set()).add(bet.address)
+
+            heapq.heappush(self._expiry, (bet.deadline, bet.address))
+
+    def load(self, bets):
+        """ Add bets read from the database. Bets that are already known will be kept """
+        added = 0
+
+        for bet in bets:
+            with self._lock:
+                if bet.address in self._by_address:
+                    continue
+
+            self.add(bet)
+            added += 1
+
+        return added
+
+    def remove(self, address):
+        """ Remove and return the pending bet with the given base58 address """
+        with self._lock:
+            return self._remove(address)
+
+    def get(self, address):
+        """ Return pending bet for given base58 or hex address or None """
+        with self._lock:
+            return self._by_address.get(address) or self._by_hex.get(address.lower())
+
+    def by_user(self, usr_id):
+        """ Return all pending bets of given user """
+        with self._lock:
+            return [self._by_address[a] for a in self._by_user.get(str(usr_id), ())]
+
+    def by_game(self, game):
+        """ Return all pending bets of given game ordered by deadline """
+        with self._lock:
+            bets = [b for b in self._by_address.values() if b.game == game]
+        return sorted(bets, key=lambda b: b.deadline)
+
+    def expire(self, now=None):
+        """ Remove and return all pending bets with a deadline in the past """
+        now = now if now else time.time()
+        expired = list()
+
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                deadline, address = heapq.heappop(self._expiry)
+                bet = self._by_address.get(address)
+
+                # Entry is outdated if bet was removed or added again
+                if bet and bet.deadline == deadline:
+                    expired.append(self._remove(address))
+
+        for bet in expired:
+            logging.info(f"Pending bet expired: {bet}")
+
+        return expired
+
+    def stats(self):
+        """ Return number of pending bets per game """
+        with self._lock:
+            bets = list(self._by_address.values())
+
+        games = dict()
+        for bet in bets:
+            games[bet.game] = games.get(bet.game, 0) + 1
+
+        return games
+
+    def __len__(self):
+        with self._lock:
+            return len(self._by_address)
+
+    def _remove(self, address):
+        bet = self._by_address.pop(address, None)
+
+        if bet:
+            self._by_hex.pop(bet.hex, None)
+
+            addresses = self._by_user.get(bet.usr_id)
+            if addresses:
+                addresses.discard(address)
+                if not addresses:
+                    del self._by_user[bet.usr_id]
+
+        return bet
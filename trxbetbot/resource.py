@@ -0,0 +1,157 @@
+import os
+import logging
+import threading
+import trxbetbot.constants as con
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+
+class ResourceCache(FileSystemEventHandler):
+    """
+    Process-wide cache for text resources of plugins and the global
+    'resources' folder. Files are read lazily on first access and
+    dropped from the cache as soon as they change on disk. Only
+    'resources' folders are watched (and cached), so that writes to
+    plugin databases don't cause any events.
+    """
+
+    # Only these files will be read while preloading
+    PRELOAD_EXT = (".sql", ".md")
+
+    def __init__(self, enabled=True):
+        self._enabled = enabled
+        self._lock = threading.Lock()
+        self._cache = dict()
+        self._dirs = self._watched_dirs()
+
+        # Increased with every change so that files read
+        # while they changed don't get cached with old content
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._observer = None
+
+        if not self._enabled:
+            return
+
+        # Watch for changes of global and plugin resources
+        self._observer = Observer()
+        for directory in self._dirs:
+            self._observer.schedule(self, directory, recursive=True)
+        self._observer.start()
+
+    def watch(self, directory):
+        """ Watch and cache another 'resources' folder, like
+        the one of a plugin that was added while running """
+        directory = os.path.abspath(directory)
+
+        if not os.path.isdir(directory):
+            return
+
+        with self._lock:
+            if directory in self._dirs:
+                return
+
+            if self._observer:
+                self._observer.schedule(self, directory, recursive=True)
+
+            self._dirs = self._dirs + [directory]
+
+    # Events of newer watchdog versions for reading files
+    READ_EVENTS = ("opened", "closed_no_write")
+
+    def on_any_event(self, event):
+        """ Remove changed, moved or deleted files from the cache """
+        if event.event_type in self.READ_EVENTS:
+            return
+
+        # Folder got a changed file. The file has its own event
+        if event.is_directory and event.event_type == "modified":
+            return
+
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+
+        for path in [os.path.abspath(p) for p in paths if p]:
+            with self._lock:
+                self._generation += 1
+
+                if event.is_directory:
+                    for key in [k for k in self._cache if k.startswith(path + os.sep)]:
+                        del self._cache[key]
+                else:
+                    self._cache.pop(path, None)
+
+    def read(self, path):
+        """ Return content of given file. Raises an exception if file can't be read """
+        path = os.path.abspath(path)
+
+        # Changes of files that are not watched wouldn't be noticed
+        cached = self._enabled and self._is_watched(path)
+
+        if cached:
+            with self._lock:
+                content = self._cache.get(path)
+                generation = self._generation
+
+            if content is not None:
+                self.hits += 1
+                return content
+
+        self.misses += 1
+
+        with open(path, "r", encoding="utf8") as f:
+            content = f.read()
+
+        if cached:
+            with self._lock:
+                # Something changed while reading the file
+                if generation == self._generation:
+                    self._cache[path] = content
+
+        return content
+
+    def preload(self):
+        """ Read all SQL and Markdown resources into the cache """
+        if not self._enabled:
+            return
+
+        count = 0
+        for directory in self._dirs:
+            for file in os.listdir(directory):
+                if not file.endswith(self.PRELOAD_EXT):
+                    continue
+
+                try:
+                    self.read(os.path.join(directory, file))
+                    count += 1
+                except Exception as e:
+                    logging.warning(f"Can't preload resource '{file}': {e}")
+
+        # Preloading shouldn't count as misses
+        self.misses = 0
+
+        logging.info(f"Preloaded {count} resources")
+
+    def stats(self):
+        """ Return number of cached files and hit / miss counters """
+        with self._lock:
+            size = len(self._cache)
+
+        return {"cached": size, "hits": self.hits, "misses": self.misses}
+
+    def _watched_dirs(self):
+        """ Return global 'resources' folder and 'resources' folders of all plugins """
+        dirs = [os.path.join(os.getcwd(), con.DIR_RES)]
+
+        plugins = os.path.join(os.getcwd(), con.DIR_SRC, con.DIR_PLG)
+        if os.path.isdir(plugins):
+            for plugin in sorted(os.listdir(plugins)):
+                dirs.append(os.path.join(plugins, plugin, con.DIR_RES))
+
+        return [os.path.abspath(d) for d in dirs if os.path.isdir(d)]
+
+    def _is_watched(self, path):
+        return any(path.startswith(directory + os.sep) for directory in self._dirs)
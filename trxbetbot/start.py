@@ -2,7 +2,6 @@ import os
 import json
 import logging
 import trxbetbot.constants as con
-import sqlite3
 
 from argparse import ArgumentParser
 from trxbetbot.tgbot import TelegramBot
@@ -174,34 +173,38 @@ class TrxBetBot:
             logging.error(f"{repr(e)} - {cls_name}")
             exit("ERROR: Can't read Tron wallet")
 
-    def _get_bet(self, key):
-        return self._get_data("bets", key)
+    def _get_bet(self, key, after, limit):
+        return self._get_data("bets", "bet_address", key, after, limit)
 
-    def _get_address(self, key):
-        return self._get_data("addresses", key)
+    def _get_address(self, key, after, limit):
+        return self._get_data("addresses", "address", key, after, limit)
 
-    def _get_data(self, table, key):
+    def _get_data(self, table, column, key, after, limit):
         path = os.path.dirname(os.path.realpath(__file__))
         path = os.path.join(path, "plugins", "bet", "data", "bet.db")
 
         if not os.path.isfile(path):
             return {"error": f"File doesn't exist: {path}"}
 
-        connection = sqlite3.connect(path)
-        cursor = connection.cursor()
-
         if key:
-            column = "bet_address" if table == "bets" else "address"
             sql = f"SELECT * FROM {table} WHERE {column} = ?"
-            cursor.execute(sql, [key])
-        else:
-            sql = f"SELECT * FROM {table}"
-            cursor.execute(sql)
+            return self.tgb.db.execute(path, sql, key)
+
+        # Without paging parameters the whole table is returned as before
+        if after is None and limit is None:
+            data = list()
+            for rows in self.tgb.db.iterate(path, f"SELECT * FROM {table}"):
+                data.extend(rows)
+            return data
+
+        # Return one page and the key to request the next one with 'after'
+        try:
+            limit = int(limit or self.cfg.get("database", "page_size") or 100)
+        except ValueError:
+            return {"error": f"Limit not valid: {limit}"}
 
-        connection.commit()
-        data = cursor.fetchall()
-        connection.close()
-        return data
+        rows, next_key = self.tgb.db.page(path, table, column, after=after, limit=limit)
+        return {"data": rows, "next": next_key}
 
     def start(self):
         if self.cfg.get("webhook", "use_webhook"):
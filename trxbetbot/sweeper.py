@@ -0,0 +1,233 @@
+import os
+import logging
+import threading
+import trxbetbot.constants as con
+
+from tronapi.main import Address
+from trxbetbot.refund import Refund
+from trxbetbot.trxapi import TRXAPI
+from trxbetbot.trongrid import Trongrid
+from trxbetbot.tronscan import Tronscan
+from trxbetbot.registry import BetRegistry
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Sweeper(threading.Thread):
+    """
+    Moves funds from generated betting addresses to the bot wallet.
+
+    Every 'interval' seconds the databases of all games are checked for bets
+    that are paid (or lost) but not swept yet and for addresses that are older
+    than 'stranded_after' seconds and never received a bet. Up to 'batch' bets
+    per game are swept by up to 'workers' threads at the same time. Balances of
+    all addresses of a round are requested concurrently from Trongrid before.
+    Balances that aren't the amount of the bet are checked with a node again.
+    Only the amount of the bet is sent to the bot wallet and its transaction
+    ID is saved as 'rtn_trx_id'. Bets that were returned to the user don't
+    owe anything and are marked with '-'. Transfers to addresses without a
+    bet are returned to their senders before the address is marked with '-'.
+    Everything else on an address belongs to users and is left there.
+    Failed sweeps are retried with the next round up to 'retries' times. The
+    number of failed sweeps is saved as 'sweep_attempts'. Addresses that
+    reached it are left alone so that they can be checked manually.
+    """
+
+    GAMES = ["bet", "mix", "win"]
+
+    def __init__(self, db: ConnectionManager, resources: ResourceCache, registry: BetRegistry, bot_address,
+                 workers=4, interval=60, batch=50, retries=3, stranded_after=3600):
+        super().__init__(name="Sweeper", daemon=True)
+
+        self._db = db
+        self._res = resources
+        self._registry = registry
+        self._bot_address = bot_address
+        self._workers = workers
+        self._interval = interval
+        self._batch = batch
+        self._retries = retries
+        self._stranded_after = stranded_after
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        self.rounds = 0
+        self.swept = 0
+        self.empty = 0
+        self.errors = 0
+        self.given_up = 0
+        self.amount = 0
+        self.returned = 0
+
+    def stop(self):
+        """ Stop sweeping after the current round """
+        self._stopped.set()
+
+    def run(self):
+        logging.info("Sweeper started")
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while not self._stopped.wait(self._interval):
+                try:
+                    self._sweep_all(executor)
+                except Exception as e:
+                    logging.error(f"Sweeper can't sweep addresses: {e}")
+
+        logging.info("Sweeper stopped")
+
+    def stats(self):
+        """ Return counters and number of addresses that were given up """
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "swept": self.swept,
+                "empty": self.empty,
+                "errors": self.errors,
+                "given_up": self.given_up,
+                "amount": self.amount,
+                "returned": self.returned
+            }
+
+    def _sweep_all(self, executor):
+        sql = self._get_sql("select_unswept.sql")
+        unswept = list()
+
+        for game in self.GAMES:
+            db_path = self._game_path(game)
+
+            if not os.path.isfile(db_path):
+                continue
+
+            # Addresses that were given up are not selected anymore
+            rows = self._db.execute(db_path, sql, f"-{self._stranded_after} seconds", self._retries, self._batch)
+
+            for address, privkey, usr_amount, bet_won, bet_trx_id, attempts in rows:
+                # Bet is still running
+                if self._registry.get(address):
+                    continue
+
+                # Only the amount of a decided bet belongs to the bot
+                owed = usr_amount if bet_won is not None and usr_amount else 0
+
+                unswept.append((db_path, address, privkey, owed, bet_trx_id, attempts))
+
+        if not unswept:
+            self.rounds += 1
+            return
+
+        try:
+            balances = Trongrid().get_balances([row[1] for row in unswept])
+        except Exception as e:
+            logging.warning(f"Sweeper can't get balances from Trongrid: {e}")
+            balances = dict()
+
+        futures = list()
+        for db_path, address, privkey, owed, bet_trx_id, attempts in unswept:
+            balance = balances.get(address)
+            futures.append(executor.submit(self._sweep, db_path, address, privkey, owed, bet_trx_id, attempts, balance))
+
+        # Wait for the round to finish
+        for future in futures:
+            future.result()
+
+        self.rounds += 1
+
+    def _sweep(self, db_path, address, privkey, owed, bet_trx_id, attempts, balance=None):
+        amount = 0
+
+        try:
+            tron = TRXAPI(private_key=privkey, default_address=address)
+
+            # Trongrid can lag behind. Balance (in "Sun") is only taken from
+            # there if it's exactly the owed amount, otherwise a node is asked
+            if not owed or balance != owed:
+                balance = tron.re(tron.trx.get_balance)
+
+            # Leave bet unswept instead of giving up the amount
+            if owed and not balance:
+                raise Exception(f"No balance but {tron.fromSun(owed)} TRX are owed")
+
+            amount = min(owed, balance)
+
+            # Stranded address. Everything on it gets returned
+            if not bet_trx_id and balance:
+                left = balance - self._return(tron, address)
+
+                if left > 0:
+                    raise Exception(f"{tron.fromSun(left)} TRX can't be returned to a sender")
+
+                balance = 0
+
+            if amount:
+                send = tron.trx.send(Address().to_hex(self._bot_address), float(tron.fromSun(amount)))
+
+                # An error was returned
+                if "code" in send and "message" in send:
+                    raise Exception(send["message"])
+
+                rtn_trx_id = send["transaction"]["txID"]
+                logging.info(f"Swept {tron.fromSun(amount)} TRX from {address} to bot: {send}")
+            else:
+                rtn_trx_id = "-"
+
+            # Funds that don't belong to the bot
+            if balance and balance > amount:
+                logging.warning(f"Left {tron.fromSun(balance - amount)} TRX of users on {address}")
+
+            self._db.execute(db_path, self._get_sql("update_swept.sql"), rtn_trx_id, address)
+        except Exception as e:
+            self._failed(db_path, address, attempts + 1, e)
+            return
+
+        with self._lock:
+            if amount:
+                self.swept += 1
+                self.amount += amount
+            else:
+                self.empty += 1
+
+    def _return(self, tron, address):
+        """ Return all transfers to an address without
+        bet to their senders and return the amount """
+        transactions = Tronscan().get_transactions_for(address)
+
+        refund = Refund(tron)
+        returned = 0
+
+        for transfer in refund.open_transfers(transactions["data"], None):
+            refund.send(transfer)
+            returned += transfer["amount"]
+
+            logging.info(f"Returned {tron.fromSun(transfer['amount'])} TRX from stranded {address}: {transfer}")
+
+        with self._lock:
+            self.returned += returned
+
+        return returned
+
+    def _failed(self, db_path, address, attempts, error):
+        """ Save failed sweep so that the address will be given up after 'retries' attempts """
+        with self._lock:
+            self.errors += 1
+
+            if attempts >= self._retries:
+                self.given_up += 1
+
+        try:
+            self._db.execute(db_path, self._get_sql("update_sweep_failed.sql"), address)
+        except Exception as e:
+            logging.error(f"Can't save failed sweep of {address}: {e}")
+
+        msg = f"Can't sweep {address} (attempt {attempts} of {self._retries}): {error}"
+
+        if attempts >= self._retries:
+            logging.error(f"{msg} - Giving up, check manually")
+        else:
+            logging.warning(msg)
+
+    def _game_path(self, game):
+        return os.path.join(os.getcwd(), con.DIR_SRC, con.DIR_PLG, game, con.DIR_DAT, f"{game}.db")
+
+    def _get_sql(self, filename):
+        return self._res.read(os.path.join(os.getcwd(), con.DIR_RES, filename))
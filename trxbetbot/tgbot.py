@@ -10,6 +10,18 @@ from zipfile import ZipFile
 from importlib import reload
 from tronapi.main import Address
 from trxbetbot.trxapi import TRXAPI
+from trxbetbot.nodemonitor import NodeMonitor
+from trxbetbot.analytics import Analytics
+from trxbetbot.addresspool import AddressPool
+from trxbetbot.blockcache import BlockCache
+from trxbetbot.blockwatcher import BlockWatcher
+from trxbetbot.confirmation import ConfirmationResolver
+from trxbetbot.payout import PayoutEngine
+from trxbetbot.registry import BetRegistry
+from trxbetbot.sweeper import Sweeper
+from trxbetbot.eventloop import EventLoop
+from trxbetbot.resource import ResourceCache
+from trxbetbot.database import ConnectionManager
 from telegram import ParseMode, Chat
 from telegram.ext import Updater, MessageHandler, Filters, CommandHandler
 from telegram.error import InvalidToken, Unauthorized
@@ -52,6 +64,12 @@ class TelegramBot:
         self.job_queue = self.updater.job_queue
         self.dispatcher = self.updater.dispatcher
 
+        # Latency and block height of all Tron nodes
+        self.nodes = NodeMonitor.shared()
+
+        if self.config.get("node_monitor", "enabled"):
+            self.nodes.start()
+
         trx_kwargs = dict()
         trx_kwargs["private_key"] = privkey
         trx_kwargs["default_address"] = Address.from_private_key(privkey)["base58"]
@@ -59,6 +77,82 @@ class TelegramBot:
         self.tron = TRXAPI(**trx_kwargs)
         logging.info(f"Bot TRX Wallet: {self.tron.address.from_private_key(privkey)}")
 
+        # Sends all payouts from the bot wallet
+        self.payouts = PayoutEngine(
+            privkey,
+            workers=self.config.get("payout", "workers") or 4,
+            batch=self.config.get("payout", "batch") or 10)
+
+        self.payouts.start()
+
+        # Pooled connections for all plugin databases
+        self.db = ConnectionManager(self.config)
+
+        # Cached SQL statements and messages of all plugins
+        self.resources = ResourceCache(bool(self.config.get("resources", "cache")))
+
+        if self.config.get("resources", "preload"):
+            self.resources.preload()
+
+        # Read-only access to all game databases at once
+        self.analytics = Analytics(self.config)
+
+        # Block IDs and transaction infos that were already fetched
+        self.blocks = BlockCache(
+            self.db,
+            self.resources,
+            size=self.config.get("block_cache", "size") or 5000,
+            persist=bool(self.config.get("block_cache", "persist")))
+
+        # Transaction infos of all pending bets fetched per block
+        self.confirmations = ConfirmationResolver(
+            self.blocks,
+            enabled=bool(self.config.get("confirmation", "enabled")),
+            max_blocks=self.config.get("confirmation", "max_blocks") or 20,
+            interval=self.config.get("confirmation", "interval") or 3)
+
+        # All bets that are not finished yet
+        self.registry = BetRegistry()
+
+        # Finds transfers to betting addresses in new blocks
+        self.watcher = BlockWatcher(
+            self.registry,
+            self.blocks,
+            self._on_transfer,
+            interval=self.config.get("block_watcher", "interval") or 3,
+            max_blocks=self.config.get("block_watcher", "max_blocks") or 20)
+
+        if self.config.get("block_watcher", "enabled"):
+            self.watcher.start()
+
+        # Moves funds of finished bets to the bot wallet
+        self.sweeper = Sweeper(
+            self.db,
+            self.resources,
+            self.registry,
+            trx_kwargs["default_address"],
+            workers=self.config.get("sweeper", "workers") or 4,
+            interval=self.config.get("sweeper", "interval") or 60,
+            batch=self.config.get("sweeper", "batch") or 50,
+            retries=self.config.get("sweeper", "retries") or 3,
+            stranded_after=self.config.get("sweeper", "stranded_after") or 3600)
+
+        if self.config.get("sweeper", "enabled"):
+            self.sweeper.start()
+
+        # Pre-generated betting addresses
+        self.addresses = AddressPool(
+            self.db,
+            self.resources,
+            enabled=bool(self.config.get("address_pool", "enabled")),
+            size=self.config.get("address_pool", "size") or 100,
+            min_size=self.config.get("address_pool", "min_size") or 25,
+            batch=self.config.get("address_pool", "batch") or 20,
+            interval=self.config.get("address_pool", "interval") or 10)
+
+        if self.config.get("address_pool", "enabled"):
+            self.addresses.start()
+
         # Load classes in folder 'plugins'
         self._load_plugins()
 
@@ -96,6 +190,14 @@ class TelegramBot:
     def bot_idle(self):
         """ Go in idle mode """
         self.updater.idle()
+        self.watcher.stop()
+        self.nodes.stop()
+        self.addresses.stop()
+        self.payouts.stop()
+        self.sweeper.stop()
+        EventLoop.shared().stop()
+        self.analytics.close_all()
+        self.db.close_all()
 
     def add_plugin(self, module_name):
         """ Load a plugin so that it can be used """
@@ -110,8 +212,13 @@ class TelegramBot:
             reload(module)
 
             with getattr(module, module_name.capitalize())(self) as plugin:
+                plugin.migrate()
                 self._add_handler(plugin)
                 self.plugins.append(plugin)
+
+                # Plugin could be new, so its resources might not be watched yet
+                self.resources.watch(plugin.get_res_path())
+
                 logging.info(f"Plugin '{plugin.get_name()}' added")
                 return {"success": True, "msg": "Plugin added"}
         except Exception as ex:
@@ -139,6 +246,15 @@ class TelegramBot:
                     raise ex
         return {"success": True, "msg": "Plugin removed"}
 
+    def _on_transfer(self, bet, transfer):
+        """ Hand a transfer found by the block watcher over to the game of the bet """
+        for plugin in self.plugins:
+            if plugin.get_name() == bet.game and hasattr(plugin, "on_transfer"):
+                plugin.on_transfer(bet, transfer)
+                return
+
+        logging.warning(f"No plugin to handle transfer {transfer} for {bet}")
+
     def _load_plugins(self):
         """ Load all plugins from the 'plugins' folder """
         try:
@@ -159,6 +275,7 @@ class TelegramBot:
             module = importlib.import_module(module_path)
 
             with getattr(module, module_name.capitalize())(self) as plugin:
+                plugin.migrate()
                 self._add_handler(plugin)
                 self.plugins.append(plugin)
                 logging.info(f"Plugin '{plugin.get_name()}' added")
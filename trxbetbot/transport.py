@@ -0,0 +1,197 @@
+import os
+import time
+import requests
+import threading
+import trxbetbot.constants as con
+
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from trxbetbot.config import ConfigManager as Cfg
+from trxbetbot.breaker import CircuitBreakers, CircuitOpenError
+from requests.packages.urllib3.util.retry import Retry
+
+
+class Transport:
+    """
+    Process-wide pooled HTTP connections for all APIs and nodes.
+
+    Every host gets its own session with keep-alive connections and the same
+    retry policy for 'http' and 'https'. If a request doesn't have its own
+    timeout, it's taken from 'timeouts' of the 'http' config if a key matches
+    the start of the path (like '/wallet/getnowblock') or of host and path
+    (like 'api.trongrid.io/v1/accounts'). The longest matching key wins.
+    Without a match the default 'timeout' will be used. Requests that have to
+    fail fast (like health checks) can be done without retries.
+    """
+
+    cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size=10, retries=5, backoff_factor=0.5, timeout=60, timeouts=None):
+        self._pool_size = pool_size
+        self._retries = retries
+        self._backoff_factor = backoff_factor
+        self._timeout = timeout
+        self._timeouts = timeouts or dict()
+        self._lock = threading.Lock()
+
+        # (Host, retry) -> session
+        self._sessions = dict()
+
+        # Host -> [requests, errors, seconds]
+        self._usage = dict()
+
+    @classmethod
+    def shared(cls):
+        """ Return transport that is shared by the whole process """
+        with cls._shared_lock:
+            if not cls._shared:
+                cls._shared = Transport(
+                    pool_size=cls.cfg.get("http", "pool_size") or 10,
+                    retries=cls.cfg.get("http", "retries") or 5,
+                    backoff_factor=cls.cfg.get("http", "backoff_factor") or 0.5,
+                    timeout=cls.cfg.get("http", "timeout") or 60,
+                    timeouts=cls.cfg.get("http", "timeouts"))
+            return cls._shared
+
+    def request(self, method, url, timeout=None, retry=True, **kwargs) -> requests.Response:
+        """ Execute HTTP request with the pooled session of the host """
+        uri = urlparse(url)
+
+        timeout = self.get_timeout(uri, timeout)
+        session = self.session(uri, retry)
+        usage = self._usage[uri.netloc]
+
+        start = time.time()
+
+        try:
+            return session.request(method, url, timeout=timeout, **kwargs)
+        except Exception:
+            with self._lock:
+                usage[1] += 1
+            raise
+        finally:
+            with self._lock:
+                usage[0] += 1
+                usage[2] += time.time() - start
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self.request("post", url, **kwargs)
+
+    def session(self, uri, retry=True) -> requests.Session:
+        """ Return session for the host of the given parsed URL """
+        key = (uri.netloc, retry)
+
+        with self._lock:
+            if key not in self._sessions:
+                if retry:
+                    retries = Retry(
+                        total=self._retries,
+                        backoff_factor=self._backoff_factor,
+                        status_forcelist=[502, 503, 504])
+                else:
+                    retries = 0
+
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=retries)
+
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+
+                self._sessions[key] = session
+                self._usage.setdefault(uri.netloc, [0, 0, 0])
+
+            return self._sessions[key]
+
+    def get_timeout(self, uri, timeout=None):
+        """ Return timeout for the given parsed URL """
+        if timeout:
+            return timeout
+
+        match = None
+
+        for key in self._timeouts:
+            if uri.path.startswith(key) or (uri.netloc + uri.path).startswith(key):
+                if not match or len(key) > len(match):
+                    match = key
+
+        if match:
+            return self._timeouts[match]
+        return self._timeout
+
+    def stats(self):
+        """ Return requests, errors, average latency and
+        number of opened connections per host """
+        stats = dict()
+
+        with self._lock:
+            sessions = dict(self._sessions)
+            usage = {host: list(values) for host, values in self._usage.items()}
+
+        for host, (requests_total, errors, seconds) in usage.items():
+            connections = 0
+
+            for (session_host, _), session in sessions.items():
+                if session_host != host:
+                    continue
+
+                for adapter in set(session.adapters.values()):
+                    pools = adapter.poolmanager.pools
+
+                    for key in pools.keys():
+                        try:
+                            connections += pools[key].num_connections
+                        except KeyError:
+                            continue
+
+            stats[host] = {
+                "requests": requests_total,
+                "errors": errors,
+                "connections": connections,
+                "latency": round(seconds / requests_total, 2) if requests_total else 0
+            }
+
+        return stats
+
+
+class TransportSession:
+    """ Replaces the session of a tronapi provider so that requests
+    to nodes use the shared transport and circuit breakers """
+
+    def __init__(self, transport: Transport):
+        self._transport = transport
+
+    @staticmethod
+    def mount(provider):
+        """ Let given tronapi provider use the shared transport """
+        provider.session = TransportSession(Transport.shared())
+
+        # Otherwise tronapi always sets a timeout of 60 seconds
+        provider._request_kwargs.setdefault("timeout", None)
+
+    def request(self, method, url, **kwargs):
+        uri = urlparse(url)
+        node = f"{uri.scheme}://{uri.netloc}"
+
+        breakers = CircuitBreakers.shared()
+
+        if not breakers.allow(node):
+            raise CircuitOpenError(f"Circuit open for {node}")
+
+        try:
+            response = self._transport.request(method, url, **kwargs)
+        except Exception:
+            breakers.failure(node)
+            raise
+
+        if response.status_code >= 500:
+            breakers.failure(node)
+        else:
+            breakers.success(node)
+
+        return response
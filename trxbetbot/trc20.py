@@ -11,7 +11,8 @@ class TRC20:
         "WIN": "TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7"
     }
 
-    def send(self, ticker: str, tron: TRXAPI, to_address: str, amount: float):
+    def transaction(self, ticker: str, tron: TRXAPI, to_address: str, amount: float):
+        """ Return unsigned transaction that sends 'amount' tokens to 'to_address' """
         cont_kwargs = dict()
         cont_kwargs["contract_address"] = tron.address.to_hex(self.SC[ticker.upper()])
         cont_kwargs["function_selector"] = "transfer(address,uint256)"
@@ -30,11 +31,16 @@ class TRC20:
 
         logging.info(f"Executing smart contract for {to_address} with following data: {cont_kwargs}")
 
+        # Create raw transaction
+        raw_tx = tron.re(tron.transaction_builder.trigger_smart_contract, **cont_kwargs)
+        return raw_tx["transaction"]
+
+    def send(self, ticker: str, tron: TRXAPI, to_address: str, amount: float):
         try:
             # Create raw transaction
-            raw_tx = tron.re(tron.transaction_builder.trigger_smart_contract, **cont_kwargs)
+            raw_tx = self.transaction(ticker, tron, to_address, amount)
             # Sign the raw transaction
-            sig_tx = tron.re(tron.trx.sign, raw_tx["transaction"])
+            sig_tx = tron.re(tron.trx.sign, raw_tx)
             # Broadcast the signed transaction
             result = tron.re(tron.trx.broadcast, sig_tx)
 
@@ -1,47 +1,105 @@
-import json
-import logging
-import requests
+import asyncio
 
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from trxbetbot.eventloop import EventLoop
+from trxbetbot.ratelimit import RateLimiter
+from trxbetbot.apiclient import APIClient, AsyncAPIClient
 
 
-class Trongrid:
+class Trongrid(APIClient):
 
     __API_URL_BASE = "https://api.trongrid.io/v1/"
 
-    def __init__(self, api_base_url=__API_URL_BASE):
-        self.api_base_url = api_base_url
-        self.request_timeout = 60
-
-        self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-        self.session.mount('http://', HTTPAdapter(max_retries=retries))
-
-    def __request(self, url):
-        try:
-            response = self.session.get(url, timeout=self.request_timeout)
-            content = json.loads(response.content.decode("utf-8"))
-            response.raise_for_status()
-            return content
-        except Exception as e:
-            msg = f"Error calling URL {url}: {e}"
-            logging.error(msg)
-            raise e
-
-    def __url_params(self, api_url, params):
-        if params:
-            api_url += '?'
-            for key, value in params.items():
-                api_url += f"{key}={value}&"
-            api_url = api_url[:-1]
-        return api_url
+    def __init__(self, api_base_url=__API_URL_BASE, priority=RateLimiter.HIGH):
+        super().__init__(api_base_url, priority)
 
     def get_account(self, address):
         api_url = f"{self.api_base_url}accounts/{address}"
-        return self.__request(api_url)
+        return self._request(api_url)
 
     # https://developers.tron.network/reference#transaction-information-by-account-address
     def get_transactions(self, address, **kwargs):
         api_url = f"{self.api_base_url}accounts/{address}/transactions"
-        return self.__request(self.__url_params(api_url, kwargs))
+        return self._request(self._url_params(api_url, kwargs))
+
+    def get_accounts(self, addresses):
+        """ Return dict with account (or None on error) per address.
+        Accounts are requested concurrently on the shared event loop """
+        client = AsyncTrongrid(self.api_base_url, self.priority)
+        return EventLoop.shared().call(client.get_accounts(addresses))
+
+    def get_balances(self, addresses):
+        """ Return dict with balance in "Sun" (or None on error) per address """
+        balances = dict()
+
+        for address, account in self.get_accounts(addresses).items():
+            if account is None:
+                balances[address] = None
+            elif account["data"]:
+                balances[address] = account["data"][0].get("balance", 0)
+            else:
+                # Address not activated yet
+                balances[address] = 0
+
+        return balances
+
+    def get_all_transactions(self, address, min_timestamp, max_timestamp, slices=1, **kwargs):
+        """ Return all transactions between given timestamps (in milliseconds).
+        The time range is split into 'slices' that are requested concurrently """
+        client = AsyncTrongrid(self.api_base_url, self.priority)
+        return EventLoop.shared().call(
+            client.get_all_transactions(address, min_timestamp, max_timestamp, slices, **kwargs))
+
+
+class AsyncTrongrid(AsyncAPIClient):
+    """ Trongrid client for the shared event loop. Synchronous
+    code should use the methods of 'Trongrid' instead """
+
+    __API_URL_BASE = "https://api.trongrid.io/v1/"
+
+    MAX_DATA = 200
+
+    def __init__(self, api_base_url=__API_URL_BASE, priority=RateLimiter.HIGH):
+        super().__init__(api_base_url, priority)
+
+    async def get_account(self, address):
+        api_url = f"{self.api_base_url}accounts/{address}"
+        return await self._request(api_url)
+
+    async def get_transactions(self, address, **kwargs):
+        api_url = f"{self.api_base_url}accounts/{address}/transactions"
+        return await self._request(self._url_params(api_url, kwargs))
+
+    async def get_accounts(self, addresses):
+        return await self._gather(addresses, self.get_account)
+
+    async def get_all_transactions(self, address, min_timestamp, max_timestamp, slices=1, **kwargs):
+        semaphore = asyncio.Semaphore(self.loop.concurrency)
+        step = (max_timestamp - min_timestamp) // max(slices, 1) or 1
+
+        async def fetch(start, end):
+            tx_kwargs = dict(kwargs)
+            tx_kwargs["limit"] = self.MAX_DATA
+            tx_kwargs["min_timestamp"] = start
+            tx_kwargs["max_timestamp"] = end
+
+            data = list()
+
+            async with semaphore:
+                while True:
+                    transactions = await self.get_transactions(address, **tx_kwargs)
+                    data.extend(transactions["data"])
+
+                    # End loop if we got less than the requested max number of transactions
+                    if len(transactions["data"]) != self.MAX_DATA:
+                        return data
+
+                    # Set fingerprint of last request to continue the next one
+                    tx_kwargs["fingerprint"] = transactions["meta"]["fingerprint"]
+
+        ranges = list()
+        for start in range(min_timestamp, max_timestamp + 1, step):
+            # Timestamps are inclusive so that ranges must not overlap
+            ranges.append((start, min(start + step - 1, max_timestamp)))
+
+        results = await asyncio.gather(*[fetch(start, end) for start, end in ranges])
+        return [tx for data in results for tx in data]
@@ -1,43 +1,40 @@
-import json
-import logging
-import requests
+from trxbetbot.eventloop import EventLoop
+from trxbetbot.ratelimit import RateLimiter
+from trxbetbot.apiclient import APIClient, AsyncAPIClient
 
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 
-
-class Tronscan:
+class Tronscan(APIClient):
 
     __API_URL_BASE = "https://apilist.tronscan.org/api/"
 
-    def __init__(self, api_base_url=__API_URL_BASE):
-        self.api_base_url = api_base_url
-        self.request_timeout = 60
-
-        self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504])
-        self.session.mount('http://', HTTPAdapter(max_retries=retries))
-
-    def __request(self, url):
-        try:
-            response = self.session.get(url, timeout=self.request_timeout)
-            content = json.loads(response.content.decode("utf-8"))
-            response.raise_for_status()
-            return content
-        except Exception as e:
-            msg = f"Error calling URL {url}: {e}"
-            logging.error(msg)
-            raise e
-
-    def __api_url_params(self, api_url, params):
-        if params:
-            api_url += '?'
-            for key, value in params.items():
-                api_url += "{0}={1}&".format(key, value)
-            api_url = api_url[:-1]
-        return api_url
+    def __init__(self, api_base_url=__API_URL_BASE, priority=RateLimiter.HIGH):
+        super().__init__(api_base_url, priority)
 
     def get_transactions_for(self, address):
         api_url = f"{self.api_base_url}transaction"
-        api_url = self.__api_url_params(api_url, {"address": address})
-        return self.__request(api_url)
+        api_url = self._url_params(api_url, {"address": address})
+        return self._request(api_url)
+
+    def get_transactions_for_all(self, addresses):
+        """ Return dict with transactions (or None on error) per address.
+        Transactions are requested concurrently on the shared event loop """
+        client = AsyncTronscan(self.api_base_url, self.priority)
+        return EventLoop.shared().call(client.get_transactions_for_all(addresses))
+
+
+class AsyncTronscan(AsyncAPIClient):
+    """ Tronscan client for the shared event loop. Synchronous
+    code should use the methods of 'Tronscan' instead """
+
+    __API_URL_BASE = "https://apilist.tronscan.org/api/"
+
+    def __init__(self, api_base_url=__API_URL_BASE, priority=RateLimiter.HIGH):
+        super().__init__(api_base_url, priority)
+
+    async def get_transactions_for(self, address):
+        api_url = f"{self.api_base_url}transaction"
+        api_url = self._url_params(api_url, {"address": address})
+        return await self._request(api_url)
+
+    async def get_transactions_for_all(self, addresses):
+        return await self._gather(addresses, self.get_transactions_for)
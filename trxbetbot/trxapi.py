@@ -1,11 +1,16 @@
 import os
 import random
 import logging
+import threading
 import trxbetbot.constants as con
 
 from tronapi import Tron
-from requests import Session
+from collections import OrderedDict
+from trxbetbot.hedging import Hedging
+from trxbetbot.breaker import CircuitBreakers
 from trxbetbot.config import ConfigManager as Cfg
+from trxbetbot.nodemonitor import NodeMonitor
+from trxbetbot.transport import Transport, TransportSession
 from requests.exceptions import ConnectionError, ReadTimeout
 
 
@@ -13,9 +18,27 @@ class TRXAPI(Tron):
 
     cfg = Cfg(os.path.join(con.DIR_CFG, con.FILE_CFG))
 
+    # Objects of the API that hedged functions can belong to
+    _HEDGED_OWNERS = ["trx", "manager", "transaction_builder"]
+
+    # Clients for hedged reads per nodes and address
+    _clones = OrderedDict()
+    _clones_lock = threading.Lock()
+    _MAX_CLONES = 100
+
     def __init__(self, **kwargs):
         super().__init__(**self.enrich_kwargs(**kwargs))
 
+        # Round of the node monitor that nodes were chosen for
+        self._routed = None
+        self._route_lock = threading.Lock()
+
+        # Requests to nodes use pooled connections
+        for provider in self.manager.providers.values():
+            TransportSession.mount(provider)
+
+        self.route()
+
     def enrich_kwargs(self, **kwargs):
         if "full_node" not in kwargs:
             full_node = self.cfg.get("tron", "default_full_node")
@@ -32,7 +55,8 @@ class TRXAPI(Tron):
         data = {
             'method': 'get',
             'url': f'{self.manager.full_node.node_url}/wallet/getnowblock',
-            'timeout': 1
+            'timeout': 1,
+            'retry': False
         }
 
         return self._node_connected(data)
@@ -41,14 +65,15 @@ class TRXAPI(Tron):
         data = {
             'method': 'get',
             'url': f'{self.manager.solidity_node.node_url}/walletsolidity/getnowblock',
-            'timeout': 1
+            'timeout': 1,
+            'retry': False
         }
 
         return self._node_connected(data)
 
     def _node_connected(self, data):
         try:
-            response = Session().request(**data)
+            response = Transport.shared().request(**data)
         except (ConnectionError, ReadTimeout):
             return False
 
@@ -65,11 +90,35 @@ class TRXAPI(Tron):
 
         return False
 
+    def route(self):
+        """ Use fastest healthy nodes if the node monitor has a ranking """
+        self._routed = NodeMonitor.shared().rounds
+
+        full_node = self._next_node(NodeMonitor.FULL)
+        if full_node:
+            self.manager.full_node.node_url = full_node
+
+        solidity_node = self._next_node(NodeMonitor.SOLIDITY)
+        if solidity_node:
+            self.manager.solidity_node.node_url = solidity_node
+
     def re(self, fun, *args, **kwargs):
         result = None
 
+        # Choose nodes again only if the node monitor has a new ranking
+        if self._routed != NodeMonitor.shared().rounds:
+            with self._route_lock:
+                if self._routed != NodeMonitor.shared().rounds:
+                    self.route()
+
         try:
-            result = fun(*args, **kwargs)
+            hedging = Hedging.shared()
+
+            # Idempotent reads can be sent to a second node if the first one is slow
+            if hedging.is_hedged(fun) and self._owner(fun) is not None:
+                result = hedging.call(fun, lambda: self._hedge(fun), *args, **kwargs)
+            else:
+                result = fun(*args, **kwargs)
             return result
         except Exception as e:
             logging.error(
@@ -81,10 +130,10 @@ class TRXAPI(Tron):
             f_connected = True
             s_connected = True
 
-            if not self.full_node_connected():
+            if not self._node_working(NodeMonitor.FULL, e):
                 f_connected = False
                 self.change_full_node()
-            if not self.solidity_node_connected():
+            if not self._node_working(NodeMonitor.SOLIDITY, e):
                 s_connected = False
                 self.change_solidity_node()
 
@@ -104,6 +153,13 @@ class TRXAPI(Tron):
                 raise ex
 
     def change_full_node(self, retry=3):
+        # Next fastest node from node monitor. No need to probe it
+        new_node = self._next_node(NodeMonitor.FULL, exclude=self.manager.full_node.node_url)
+        if new_node:
+            self.manager.full_node.node_url = new_node
+            logging.info(f"TRON API: Changed Full Node to {new_node}")
+            return
+
         # Get server list from config
         full_nodes = self.cfg.get("tron", "full_node_list")
 
@@ -123,6 +179,13 @@ class TRXAPI(Tron):
         logging.warning("TRON API: Reset Full Node to default")
 
     def change_solidity_node(self, retry=3):
+        # Next fastest node from node monitor. No need to probe it
+        new_node = self._next_node(NodeMonitor.SOLIDITY, exclude=self.manager.solidity_node.node_url)
+        if new_node:
+            self.manager.solidity_node.node_url = new_node
+            logging.info(f"TRON API: Changed Solidity Node to {new_node}")
+            return
+
         # Get server list from config
         solidity_nodes = self.cfg.get("tron", "solidity_node_list")
 
@@ -138,5 +201,99 @@ class TRXAPI(Tron):
                 else:
                     logging.warning(f"TRON API: Solidity Node #{i+1} not available: {new_node}")
 
-        self.manager.full_node.node_url = self.enrich_kwargs(**{})["solidity_node"]
+        self.manager.solidity_node.node_url = self.enrich_kwargs(**{})["solidity_node"]
         logging.warning("TRON API: Reset Solidity Node to default")
+
+    def _node_working(self, kind, error):
+        """ Return TRUE if node of given type is working. Ranking of node
+        monitor is used if available, otherwise the node will be probed """
+        monitor = NodeMonitor.shared()
+
+        if kind == NodeMonitor.FULL:
+            node = self.manager.full_node.node_url
+        else:
+            node = self.manager.solidity_node.node_url
+
+        if not monitor.best(kind):
+            if kind == NodeMonitor.FULL:
+                return self.full_node_connected()
+            return self.solidity_node_connected()
+
+        if isinstance(error, (ConnectionError, ReadTimeout)):
+            return False
+
+        return monitor.is_healthy(node)
+
+    def _next_node(self, kind, exclude=None):
+        """ Return fastest healthy node of given type that
+        doesn't have an open circuit or None """
+        breakers = CircuitBreakers.shared()
+
+        for node in NodeMonitor.shared().ranking(kind):
+            if node != exclude and not breakers.is_open(node):
+                return node
+        return None
+
+    def _owner(self, fun):
+        """ Return name of the object of this API that given function belongs
+        to ('' for the API itself) or None if it can't be hedged """
+        owner = getattr(fun, "__self__", None)
+
+        if owner is self:
+            return ""
+
+        for name in self._HEDGED_OWNERS:
+            if owner is getattr(self, name, None):
+                return name
+
+        logging.warning(f"TRON API: Can't hedge {fun.__name__}() of unknown object {owner}")
+        return None
+
+    def _hedge(self, fun):
+        """ Return given function of a client that
+        uses the next fastest nodes or None """
+        full_node = self._next_node(NodeMonitor.FULL, exclude=self.manager.full_node.node_url)
+        solidity_node = self._next_node(NodeMonitor.SOLIDITY, exclude=self.manager.solidity_node.node_url)
+
+        if not full_node and not solidity_node:
+            return None
+
+        full_node = full_node or self.manager.full_node.node_url
+        solidity_node = solidity_node or self.manager.solidity_node.node_url
+
+        # Hedged functions only read, so the client doesn't need the private key
+        address = self.default_address.hex if self.default_address else None
+
+        clone = self._clone(full_node, solidity_node, address)
+
+        name = self._owner(fun)
+        if name:
+            clone = getattr(clone, name)
+
+        return getattr(clone, fun.__name__)
+
+    @classmethod
+    def _clone(cls, full_node, solidity_node, address):
+        """ Return cached client for given nodes and address """
+        key = (full_node, solidity_node, address)
+
+        with cls._clones_lock:
+            if key in cls._clones:
+                cls._clones.move_to_end(key)
+                return cls._clones[key]
+
+        kwargs = dict()
+        if address:
+            kwargs["default_address"] = address
+
+        clone = TRXAPI(**kwargs)
+        clone.manager.full_node.node_url = full_node
+        clone.manager.solidity_node.node_url = solidity_node
+
+        with cls._clones_lock:
+            cls._clones[key] = clone
+
+            while len(cls._clones) > cls._MAX_CLONES:
+                cls._clones.popitem(last=False)
+
+        return clone
@@ -19,17 +19,8 @@ class EndpointAction(object):
                 return render_template("default.html")
 
         if self.action:
-            param = str(inspect.signature(self.action))[1:-1]
-
-            if param:
-                param = request.args.get(param)
-
-                if param:
-                    result = self.action(param)
-                else:
-                    result = self.action(None)
-            else:
-                result = self.action()
+            params = inspect.signature(self.action).parameters
+            result = self.action(*[request.args.get(p) for p in params])
         else:
             return render_template("default.html")
 